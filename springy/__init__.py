@@ -1,4 +1,5 @@
 from .indices import Index, registry
+from .changes import depends_on
 from .helpers import query, parse, index, model_indices, multisearch
 from .utils import autodiscover
 from . import exceptions
@@ -6,11 +6,21 @@ class SpringyAppConfig(AppConfig):
     verbose_name = 'Springy'
 
     def ready(self):
-        from elasticsearch_dsl.connections import connections
-        from .settings import DATABASES, AUTODISCOVER_MODULE, AUTODISCOVER
+        from .connections import configure_connections
+        from .settings import (
+                DATABASES, AUTODISCOVER_MODULE, AUTODISCOVER, AUTO_UPDATE,
+                OUTBOX)
         from .utils import autodiscover
 
-        connections.configure(**DATABASES)
+        configure_connections(DATABASES)
 
         if AUTODISCOVER:
             autodiscover(AUTODISCOVER_MODULE)
+
+        if AUTO_UPDATE:
+            from .signals import connect_signals
+            connect_signals()
+
+        if OUTBOX:
+            from .outbox import connect_signals as connect_outbox_signals
+            connect_outbox_signals()
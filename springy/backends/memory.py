@@ -0,0 +1,1299 @@
+"""
+In-process Elasticsearch stand-in for tests.
+
+`MemoryElasticsearch` implements the subset of `elasticsearch.Elasticsearch`
+client API used by Springy and Elasticsearch-DSL: index management,
+single and bulk document operations, (sliced) scan/scroll, count, msearch,
+reindex tasks, completion suggester, profile and basic `match_all`, `term`,
+`terms`, `match`, `multi_match`, `query_string`, `bool`, `range`, `ids`,
+`exists` and `prefix` queries.
+
+Configure it as a connection in `ELASTIC_DATABASES`:
+
+    ELASTIC_DATABASES = {
+        'default': {
+            'class': 'springy.backends.memory.MemoryElasticsearch',
+            },
+        }
+
+Text is analyzed by lowercasing and splitting on non-word characters.
+Scoring is a simple count of matched terms. Aggregations are not supported.
+"""
+
+import copy
+import datetime
+import fnmatch
+import functools
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+
+import six
+from elasticsearch.exceptions import (
+        TransportError, NotFoundError, RequestError, ConflictError)
+from elasticsearch.serializer import JSONSerializer
+
+from ..planner import normalize_settings, unflatten_settings
+
+
+STATIC_SETTINGS = ('codec', 'routing_partition_size')
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def api(func):
+    """
+    Handle transport-level `ignore` and `request_timeout` arguments
+    and serialize access to the in-memory cluster.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        ignore = kwargs.pop('ignore', ())
+        kwargs.pop('request_timeout', None)
+        if isinstance(ignore, int):
+            ignore = (ignore,)
+        try:
+            with self._lock:
+                return func(self, *args, **kwargs)
+        except TransportError as ex:
+            if ex.status_code in ignore:
+                return ex.info
+            raise
+    return wrapper
+
+
+def _error(exc_class, status, error_type, reason):
+    return exc_class(status, error_type, {
+        'error': {'type': error_type, 'reason': reason}, 'status': status})
+
+
+def _slice_id(doc_id, max_slices):
+    return (zlib.crc32(doc_id.encode('utf-8')) & 0xffffffff) % max_slices
+
+
+def _split_names(value):
+    if value is None:
+        return []
+    if isinstance(value, six.string_types):
+        value = value.split(',')
+    return [x.strip() for x in value if x and x.strip()]
+
+
+def _to_comparable(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def tokenize(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(itertools.chain(*map(tokenize, value)))
+    if isinstance(value, bool):
+        value = six.text_type(value).lower()
+    return TOKEN_RE.findall(six.text_type(value).lower())
+
+
+def get_field_values(source, path):
+    """
+    Return list of values of dotted `path` in document source
+    """
+
+    values = [source]
+    for part in path.split('.'):
+        found = []
+        for value in values:
+            if isinstance(value, list):
+                value = [x.get(part) for x in value if isinstance(x, dict)]
+                found.extend(x for x in value if x is not None)
+            elif isinstance(value, dict) and value.get(part) is not None:
+                found.append(value[part])
+        values = found
+    flat = []
+    for value in values:
+        if isinstance(value, list):
+            flat.extend(value)
+        else:
+            flat.append(value)
+    return flat
+
+
+def iter_text_fields(source, prefix=''):
+    for key, value in source.items():
+        if isinstance(value, dict):
+            for item in iter_text_fields(value, prefix=prefix+key+'.'):
+                yield item
+        else:
+            yield prefix+key
+
+
+def _single_field(params):
+    params = dict(params)
+    for key in ('boost', '_name'):
+        params.pop(key, None)
+    if len(params) != 1:
+        raise _error(
+                RequestError, 400, 'parsing_exception',
+                'Query must contain exactly one field')
+    return list(params.items())[0]
+
+
+class Document(object):
+    def __init__(self, doc_id, doc_type, source, version=1, routing=None):
+        self.id = doc_id
+        self.doc_type = doc_type
+        self.source = source
+        self.version = version
+        self.routing = routing
+
+
+class QueryMatcher(object):
+    """
+    Evaluates query DSL against document sources.
+    Returns score for matching documents or None.
+    """
+
+    def match(self, query, doc):
+        if not query:
+            return 1.0
+        if len(query) != 1:
+            raise _error(
+                    RequestError, 400, 'parsing_exception',
+                    'Query must contain exactly one clause')
+        name, params = list(query.items())[0]
+        try:
+            method = getattr(self, 'match_%s' % name)
+        except AttributeError:
+            raise NotImplementedError(
+                    'Query `%s` is not supported by memory backend' % name)
+        return method(params, doc)
+
+    def match_match_all(self, params, doc):
+        return 1.0
+
+    def match_match_none(self, params, doc):
+        return None
+
+    def _term_matches(self, field, value, doc):
+        if field == '_id':
+            return six.text_type(value) == six.text_type(doc.id)
+        value = _to_comparable(value)
+        for doc_value in get_field_values(doc.source, field):
+            if doc_value == value:
+                return True
+            if isinstance(doc_value, six.string_types) and isinstance(
+                    value, six.string_types):
+                if value.lower() in tokenize(doc_value):
+                    return True
+        return False
+
+    def match_term(self, params, doc):
+        field, value = _single_field(params)
+        if isinstance(value, dict):
+            value = value.get('value')
+        return 1.0 if self._term_matches(field, value, doc) else None
+
+    def match_terms(self, params, doc):
+        field, values = _single_field(params)
+        for value in values:
+            if self._term_matches(field, value, doc):
+                return 1.0
+        return None
+
+    def match_ids(self, params, doc):
+        values = [six.text_type(x) for x in params.get('values', [])]
+        return 1.0 if six.text_type(doc.id) in values else None
+
+    def match_exists(self, params, doc):
+        values = get_field_values(doc.source, params['field'])
+        return 1.0 if values else None
+
+    def match_prefix(self, params, doc):
+        field, value = _single_field(params)
+        if isinstance(value, dict):
+            value = value.get('value')
+        value = six.text_type(value).lower()
+        for token in tokenize(get_field_values(doc.source, field)):
+            if token.startswith(value):
+                return 1.0
+        return None
+
+    def match_range(self, params, doc):
+        field, bounds = _single_field(params)
+        ops = {
+            'gt': lambda x, y: x > y,
+            'gte': lambda x, y: x >= y,
+            'lt': lambda x, y: x < y,
+            'lte': lambda x, y: x <= y,
+            }
+        for value in get_field_values(doc.source, field):
+            try:
+                if all(ops[op](value, _to_comparable(bound))
+                       for op, bound in bounds.items() if op in ops):
+                    return 1.0
+            except TypeError:
+                continue
+        return None
+
+    def _score_tokens(self, tokens, fields, doc, operator='or'):
+        if fields:
+            doc_tokens = tokenize(list(itertools.chain(*[
+                get_field_values(doc.source, x) for x in fields])))
+        else:
+            doc_tokens = tokenize(list(itertools.chain(*[
+                get_field_values(doc.source, x)
+                for x in iter_text_fields(doc.source)])))
+        matched = [x for x in tokens if x in doc_tokens]
+        if not matched or (operator == 'and' and len(matched) < len(tokens)):
+            return None
+        return float(sum(doc_tokens.count(x) for x in matched))
+
+    def match_match(self, params, doc):
+        field, value = _single_field(params)
+        operator = 'or'
+        if isinstance(value, dict):
+            operator = value.get('operator', 'or').lower()
+            value = value.get('query')
+        return self._score_tokens(
+                tokenize(value), [field], doc, operator=operator)
+
+    def match_match_phrase(self, params, doc):
+        field, value = _single_field(params)
+        if isinstance(value, dict):
+            value = value.get('query')
+        tokens = tokenize(value)
+        for doc_value in get_field_values(doc.source, field):
+            doc_tokens = tokenize(doc_value)
+            for x in range(len(doc_tokens) - len(tokens) + 1):
+                if doc_tokens[x:x+len(tokens)] == tokens:
+                    return float(len(tokens))
+        return None
+
+    def match_multi_match(self, params, doc):
+        fields = [x.split('^')[0] for x in params.get('fields', [])]
+        return self._score_tokens(
+                tokenize(params.get('query')), fields, doc,
+                operator=params.get('operator', 'or').lower())
+
+    def _parse_query_string(self, query, default_operator):
+        clauses = []
+        next_required = False
+        for part in re.findall(r'[+-]?(?:[\w.]+:)?(?:"[^"]*"|\S+)', query):
+            if part in ('AND', '&&'):
+                if clauses:
+                    clauses[-1][0] = 'must'
+                next_required = True
+                continue
+            if part in ('OR', '||'):
+                continue
+            if part == 'NOT':
+                next_required = 'not'
+                continue
+
+            occur = 'must' if default_operator == 'and' else 'should'
+            if next_required == 'not':
+                occur = 'must_not'
+            elif next_required:
+                occur = 'must'
+            next_required = False
+
+            if part[0] == '+':
+                occur, part = 'must', part[1:]
+            elif part[0] == '-':
+                occur, part = 'must_not', part[1:]
+
+            field = None
+            if ':' in part and not part.startswith('"'):
+                field, part = part.split(':', 1)
+            clauses.append([occur, field, part.strip('"')])
+        return clauses
+
+    def match_query_string(self, params, doc):
+        default_fields = params.get('fields') or (
+                [params['default_field']] if params.get('default_field')
+                else [])
+        default_fields = [x.split('^')[0] for x in default_fields]
+        clauses = self._parse_query_string(
+                params.get('query', ''),
+                params.get('default_operator', 'or').lower())
+
+        score, should_matched, has_should = 0.0, False, False
+        for occur, field, text in clauses:
+            if text == '*':
+                matched = 1.0
+            elif text.endswith('*'):
+                fields = [field] if field else (
+                        default_fields or list(iter_text_fields(doc.source)))
+                matched = None
+                prefix = text[:-1].lower()
+                for token in tokenize(list(itertools.chain(*[
+                        get_field_values(doc.source, x) for x in fields]))):
+                    if token.startswith(prefix):
+                        matched = 1.0
+                        break
+            else:
+                matched = self._score_tokens(
+                        tokenize(text), [field] if field else default_fields,
+                        doc, operator='and')
+
+            if occur == 'must_not':
+                if matched is not None:
+                    return None
+            elif occur == 'must':
+                if matched is None:
+                    return None
+                score += matched
+            else:
+                has_should = True
+                if matched is not None:
+                    should_matched = True
+                    score += matched
+
+        if has_should and not should_matched and not any(
+                x[0] == 'must' for x in clauses):
+            return None
+        return score or 1.0
+
+    def match_bool(self, params, doc):
+        def as_list(value):
+            if value is None:
+                return []
+            return value if isinstance(value, list) else [value]
+
+        score = 0.0
+        for clause in as_list(params.get('must')):
+            matched = self.match(clause, doc)
+            if matched is None:
+                return None
+            score += matched
+        for clause in as_list(params.get('filter')):
+            if self.match(clause, doc) is None:
+                return None
+        for clause in as_list(params.get('must_not')):
+            if self.match(clause, doc) is not None:
+                return None
+
+        should = as_list(params.get('should'))
+        minimum = params.get('minimum_should_match')
+        if minimum is None:
+            minimum = 0 if (params.get('must') or params.get('filter')) else 1
+        matched_should = 0
+        for clause in should:
+            matched = self.match(clause, doc)
+            if matched is not None:
+                matched_should += 1
+                score += matched
+        if should and matched_should < int(minimum):
+            return None
+        return score or (1.0 if not params.get('filter') else 0.0)
+
+    def match_constant_score(self, params, doc):
+        query = params.get('filter') or params.get('query')
+        if self.match(query, doc) is None:
+            return None
+        return float(params.get('boost', 1.0))
+
+
+class MemoryIndex(object):
+    def __init__(self, name, settings=None, mappings=None, aliases=None):
+        self.name = name
+        self.settings = {
+            'number_of_shards': '5',
+            'number_of_replicas': '1',
+            }
+        self.settings.update(normalize_settings(settings))
+        self.settings.update({
+            'creation_date': six.text_type(int(time.time() * 1000)),
+            'uuid': uuid.uuid4().hex,
+            'provided_name': name,
+            })
+        self.mappings = copy.deepcopy(mappings or {})
+        self.aliases = set(aliases or ())
+        self.docs = OrderedDict()
+        self.closed = False
+
+    def get_settings(self):
+        return {'index': unflatten_settings(self.settings)}
+
+
+class MemoryIndicesClient(object):
+    def __init__(self, client):
+        self.client = client
+        self._lock = client._lock
+
+    @property
+    def _indices(self):
+        return self.client._indices
+
+    def _create(self, index, body=None):
+        body = body or {}
+        settings = dict(body.get('settings') or {})
+        mappings = dict(body.get('mappings') or {})
+        aliases = set((body.get('aliases') or {}).keys())
+        for template in sorted(
+                self.client._templates.values(),
+                key=lambda x: x.get('order', 0)):
+            patterns = template.get('index_patterns') or _split_names(
+                    template.get('template'))
+            if any(fnmatch.fnmatch(index, x) for x in patterns):
+                merged = normalize_settings(template.get('settings'))
+                merged.update(normalize_settings(settings))
+                settings = merged
+                for doc_type, mapping in (
+                        template.get('mappings') or {}).items():
+                    mappings.setdefault(doc_type, mapping)
+                aliases.update((template.get('aliases') or {}).keys())
+        self._indices[index] = MemoryIndex(
+                index, settings=settings, mappings=mappings, aliases=aliases)
+        return self._indices[index]
+
+    @api
+    def create(self, index, body=None, **params):
+        if index in self._indices:
+            raise _error(
+                    RequestError, 400, 'index_already_exists_exception',
+                    'index [%s] already exists' % index)
+        self._create(index, body)
+        return {'acknowledged': True, 'shards_acknowledged': True}
+
+    @api
+    def exists(self, index, **params):
+        try:
+            return bool(self.client._resolve(index))
+        except NotFoundError:
+            return False
+
+    @api
+    def exists_type(self, index, doc_type, **params):
+        types = _split_names(doc_type)
+        for idx in self.client._resolve(index, ignore_unavailable=True):
+            if any(x in idx.mappings for x in types):
+                return True
+        return False
+
+    @api
+    def delete(self, index, **params):
+        for idx in self.client._resolve(index):
+            del self._indices[idx.name]
+        return {'acknowledged': True}
+
+    @api
+    def open(self, index, **params):
+        for idx in self.client._resolve(index):
+            idx.closed = False
+        return {'acknowledged': True}
+
+    @api
+    def close(self, index, **params):
+        for idx in self.client._resolve(index):
+            idx.closed = True
+        return {'acknowledged': True}
+
+    @api
+    def refresh(self, index=None, **params):
+        return {'_shards': {'total': 1, 'successful': 1, 'failed': 0}}
+
+    flush = refresh
+    clear_cache = refresh
+    forcemerge = refresh
+
+    @api
+    def get(self, index, **params):
+        return dict(
+                (idx.name, {
+                    'aliases': dict((x, {}) for x in idx.aliases),
+                    'mappings': copy.deepcopy(idx.mappings),
+                    'settings': idx.get_settings(),
+                    })
+                for idx in self.client._resolve(index))
+
+    @api
+    def get_settings(self, index=None, name=None, **params):
+        return dict(
+                (idx.name, {'settings': idx.get_settings()})
+                for idx in self.client._resolve(index))
+
+    @api
+    def put_settings(self, body, index=None, **params):
+        settings = normalize_settings(body)
+        preserve_existing = six.text_type(
+                params.get('preserve_existing', '')).lower() == 'true'
+
+        for idx in self.client._resolve(index):
+            for key, value in settings.items():
+                if key == 'number_of_shards':
+                    raise _error(
+                            RequestError, 400, 'illegal_argument_exception',
+                            'final index setting [index.number_of_shards], '
+                            'not updateable')
+                static = key.startswith('analysis.') or key in STATIC_SETTINGS
+                if static and not idx.closed and idx.settings.get(
+                        key) != value:
+                    raise _error(
+                            RequestError, 400, 'illegal_argument_exception',
+                            "Can't update non dynamic settings [[index.%s]] "
+                            "for open indices [%s]" % (key, idx.name))
+            for key, value in settings.items():
+                if preserve_existing and key in idx.settings:
+                    continue
+                idx.settings[key] = value
+        return {'acknowledged': True}
+
+    @api
+    def get_mapping(self, index=None, doc_type=None, **params):
+        types = _split_names(doc_type)
+        result = {}
+        for idx in self.client._resolve(index):
+            mappings = dict(
+                    (k, copy.deepcopy(v)) for k, v in idx.mappings.items()
+                    if not types or k in types)
+            result[idx.name] = {'mappings': mappings}
+        return result
+
+    @api
+    def put_mapping(self, doc_type, body, index=None, **params):
+        for idx in self.client._resolve(index):
+            mapping = idx.mappings.setdefault(doc_type, {'properties': {}})
+            properties = mapping.setdefault('properties', {})
+            for name, definition in (body.get('properties') or {}).items():
+                current = properties.get(name)
+                if current and current.get('type', 'object') != \
+                        definition.get('type', 'object'):
+                    raise _error(
+                            RequestError, 400, 'illegal_argument_exception',
+                            'mapper [%s] of different type, current_type '
+                            '[%s], merged_type [%s]' % (
+                                name, current.get('type'),
+                                definition.get('type')))
+                properties[name] = copy.deepcopy(definition)
+            for key, value in body.items():
+                if key != 'properties':
+                    mapping[key] = copy.deepcopy(value)
+        return {'acknowledged': True}
+
+    @api
+    def put_template(self, name, body, **params):
+        self.client._templates[name] = copy.deepcopy(body)
+        return {'acknowledged': True}
+
+    @api
+    def get_template(self, name=None, **params):
+        names = _split_names(name)
+        return dict(
+                (k, copy.deepcopy(v))
+                for k, v in self.client._templates.items()
+                if not names or k in names)
+
+    @api
+    def exists_template(self, name, **params):
+        return name in self.client._templates
+
+    @api
+    def delete_template(self, name, **params):
+        if name not in self.client._templates:
+            raise _error(
+                    NotFoundError, 404, 'index_template_missing_exception',
+                    'index_template [%s] missing' % name)
+        del self.client._templates[name]
+        return {'acknowledged': True}
+
+    @api
+    def put_alias(self, index, name, body=None, **params):
+        for idx in self.client._resolve(index):
+            idx.aliases.add(name)
+        return {'acknowledged': True}
+
+    @api
+    def exists_alias(self, index=None, name=None, **params):
+        names = _split_names(name)
+        for idx in self.client._resolve(index, ignore_unavailable=True):
+            if any(x in idx.aliases for x in names):
+                return True
+        return False
+
+    @api
+    def get_alias(self, index=None, name=None, **params):
+        names = _split_names(name)
+        result = {}
+        for idx in self.client._resolve(index, ignore_unavailable=True):
+            aliases = [x for x in idx.aliases if not names or x in names]
+            if aliases or not names:
+                result[idx.name] = {
+                        'aliases': dict((x, {}) for x in aliases)}
+        if names and not result:
+            raise _error(
+                    NotFoundError, 404, 'aliases_not_found_exception',
+                    'aliases [%s] missing' % name)
+        return result
+
+    @api
+    def delete_alias(self, index, name, **params):
+        for idx in self.client._resolve(index):
+            for alias in _split_names(name):
+                idx.aliases.discard(alias)
+        return {'acknowledged': True}
+
+    @api
+    def update_aliases(self, body, **params):
+        for action in body.get('actions', []):
+            (op, args), = action.items()
+            indices = _split_names(args.get('index') or args.get('indices'))
+            aliases = _split_names(args.get('alias') or args.get('aliases'))
+            if op == 'remove_index':
+                # only concrete indices can be removed
+                for name in indices:
+                    if name not in self._indices:
+                        raise _error(
+                                NotFoundError, 404,
+                                'index_not_found_exception', 'no such index')
+                    del self._indices[name]
+                continue
+            for idx in self.client._resolve(indices):
+                if op == 'add':
+                    idx.aliases.update(aliases)
+                elif op == 'remove':
+                    idx.aliases.difference_update(aliases)
+        return {'acknowledged': True}
+
+
+class MemoryClusterClient(object):
+    def __init__(self, client):
+        self.client = client
+        self._lock = client._lock
+
+    @api
+    def health(self, index=None, **params):
+        return {'status': 'green', 'timed_out': False}
+
+    @api
+    def state(self, metric=None, index=None, **params):
+        return {'metadata': {'indices': dict(
+            (idx.name, {'state': 'close' if idx.closed else 'open'})
+            for idx in self.client._resolve(index))}}
+
+
+class MemoryTasksClient(object):
+    def __init__(self, client):
+        self.client = client
+        self._lock = client._lock
+
+    @api
+    def get(self, task_id=None, **params):
+        try:
+            return self.client._tasks[task_id]
+        except KeyError:
+            raise _error(
+                    NotFoundError, 404, 'resource_not_found_exception',
+                    'task [%s] isn\'t running and hasn\'t stored its '
+                    'results' % task_id)
+
+
+class MemoryTransport(object):
+    def __init__(self):
+        self.serializer = JSONSerializer()
+
+
+class MemoryElasticsearch(object):
+    """
+    In-memory implementation of `elasticsearch.Elasticsearch` client
+    """
+
+    def __init__(self, **kwargs):
+        self._lock = threading.RLock()
+        self._indices = {}
+        self._templates = {}
+        self._scrolls = {}
+        self._tasks = {}
+        self.transport = MemoryTransport()
+        self.indices = MemoryIndicesClient(self)
+        self.cluster = MemoryClusterClient(self)
+        self.tasks = MemoryTasksClient(self)
+        self.matcher = QueryMatcher()
+
+    def _serialize(self, data):
+        serializer = self.transport.serializer
+        return serializer.loads(serializer.dumps(data))
+
+    def _resolve(self, index, ignore_unavailable=False):
+        """
+        Resolve index names, aliases and patterns to MemoryIndex list
+        """
+
+        names = _split_names(index)
+        if not names or names == ['_all']:
+            return list(self._indices.values())
+
+        found = OrderedDict()
+        for name in names:
+            matched = [
+                    x for x in self._indices.values()
+                    if fnmatch.fnmatch(x.name, name) or name in x.aliases]
+            if not matched and '*' not in name and not ignore_unavailable:
+                raise _error(
+                        NotFoundError, 404, 'index_not_found_exception',
+                        'no such index')
+            for idx in matched:
+                found[idx.name] = idx
+        return list(found.values())
+
+    def _get_write_index(self, index):
+        if index in self._indices:
+            idx = self._indices[index]
+        else:
+            aliased = [x for x in self._indices.values() if index in x.aliases]
+            if len(aliased) > 1:
+                raise _error(
+                        RequestError, 400, 'illegal_argument_exception',
+                        'Alias [%s] has more than one indices associated '
+                        'with it, can\'t execute a single index op' % index)
+            idx = aliased[0] if aliased else (
+                    self.indices._create(index))
+        if idx.closed:
+            raise _error(
+                    RequestError, 400, 'index_closed_exception',
+                    'closed')
+        return idx
+
+    def _index_doc(self, index, doc_type, body, id=None, op_type='index',
+                   routing=None):
+        idx = self._get_write_index(index)
+        doc_id = six.text_type(id) if id is not None else uuid.uuid4().hex
+        current = idx.docs.get(doc_id)
+        if current is not None and op_type == 'create':
+            raise _error(
+                    ConflictError, 409, 'version_conflict_engine_exception',
+                    '[%s][%s]: version conflict, document already exists' % (
+                        doc_type, doc_id))
+
+        mapping = idx.mappings.setdefault(doc_type, {'properties': {}})
+        properties = mapping.setdefault('properties', {})
+        source = self._serialize(body)
+        for name in source:
+            properties.setdefault(name, {'type': 'text'})
+
+        version = current.version + 1 if current else 1
+        idx.docs[doc_id] = Document(
+                doc_id, doc_type, source, version=version, routing=routing)
+        return {
+            '_index': idx.name, '_type': doc_type, '_id': doc_id,
+            '_version': version,
+            'result': 'updated' if current else 'created',
+            'created': current is None,
+            '_shards': {'total': 1, 'successful': 1, 'failed': 0},
+            }
+
+    def _get_doc(self, index, doc_type, id):
+        for idx in self._resolve(index):
+            doc = idx.docs.get(six.text_type(id))
+            if doc is not None and (
+                    doc_type in (None, '_all') or doc.doc_type == doc_type):
+                return idx, doc
+        raise NotFoundError(404, 'not_found', {
+            '_index': index, '_type': doc_type, '_id': six.text_type(id),
+            'found': False})
+
+    def _delete_doc(self, index, doc_type, id):
+        idx, doc = self._get_doc(index, doc_type, id)
+        del idx.docs[doc.id]
+        return {
+            '_index': idx.name, '_type': doc.doc_type, '_id': doc.id,
+            '_version': doc.version + 1, 'result': 'deleted', 'found': True}
+
+    def _update_doc(self, index, doc_type, id, body):
+        try:
+            idx, doc = self._get_doc(index, doc_type, id)
+        except NotFoundError:
+            if body.get('doc_as_upsert') or 'upsert' in body:
+                return self._index_doc(
+                        index, doc_type,
+                        body.get('upsert') or body.get('doc') or {}, id=id)
+            raise _error(
+                    NotFoundError, 404, 'document_missing_exception',
+                    '[%s][%s]: document missing' % (doc_type, id))
+
+        if 'script' in body:
+            raise NotImplementedError(
+                    'Scripted updates are not supported by memory backend')
+
+        def merge(target, changes):
+            for key, value in changes.items():
+                if isinstance(value, dict) and isinstance(
+                        target.get(key), dict):
+                    merge(target[key], value)
+                else:
+                    target[key] = value
+
+        merge(doc.source, self._serialize(body.get('doc') or {}))
+        doc.version += 1
+        return {
+            '_index': idx.name, '_type': doc.doc_type, '_id': doc.id,
+            '_version': doc.version, 'result': 'updated'}
+
+    @api
+    def ping(self, **params):
+        return True
+
+    @api
+    def info(self, **params):
+        return {
+            'name': 'memory',
+            'cluster_name': 'springy-memory',
+            'version': {'number': '5.6.0'},
+            }
+
+    @api
+    def index(self, index, doc_type, body, id=None, **params):
+        return self._index_doc(
+                index, doc_type, body, id=id,
+                op_type=params.get('op_type', 'index'),
+                routing=params.get('routing'))
+
+    @api
+    def create(self, index, doc_type, id, body, **params):
+        return self._index_doc(
+                index, doc_type, body, id=id, op_type='create',
+                routing=params.get('routing'))
+
+    @api
+    def get(self, index, id, doc_type='_all', **params):
+        idx, doc = self._get_doc(index, doc_type, id)
+        return {
+            '_index': idx.name, '_type': doc.doc_type, '_id': doc.id,
+            '_version': doc.version, 'found': True,
+            '_source': copy.deepcopy(doc.source)}
+
+    @api
+    def exists(self, index, doc_type, id, **params):
+        try:
+            self._get_doc(index, doc_type, id)
+        except NotFoundError:
+            return False
+        return True
+
+    @api
+    def delete(self, index, doc_type, id, **params):
+        return self._delete_doc(index, doc_type, id)
+
+    @api
+    def update(self, index, doc_type, id, body=None, **params):
+        return self._update_doc(index, doc_type, id, body or {})
+
+    def _parse_bulk_body(self, body):
+        if isinstance(body, six.binary_type):
+            body = body.decode('utf-8')
+        if isinstance(body, six.string_types):
+            return [json.loads(x) for x in body.splitlines() if x.strip()]
+        return [
+                json.loads(x) if isinstance(x, six.string_types) else x
+                for x in body]
+
+    @api
+    def bulk(self, body, index=None, doc_type=None, **params):
+        lines = self._parse_bulk_body(body)
+        items, errors = [], False
+        position = 0
+        while position < len(lines):
+            (op_type, meta), = lines[position].items()
+            position += 1
+            source = None
+            if op_type != 'delete':
+                source = lines[position]
+                position += 1
+
+            _index = meta.get('_index', index)
+            _type = meta.get('_type', doc_type)
+            _id = meta.get('_id')
+
+            try:
+                if op_type in ('index', 'create'):
+                    result = self._index_doc(
+                            _index, _type, source, id=_id, op_type=op_type,
+                            routing=meta.get('_routing'))
+                    status = 201 if result['created'] else 200
+                elif op_type == 'delete':
+                    result = self._delete_doc(_index, _type, _id)
+                    status = 200
+                elif op_type == 'update':
+                    result = self._update_doc(_index, _type, _id, source)
+                    status = 200
+                else:
+                    raise _error(
+                            RequestError, 400, 'illegal_argument_exception',
+                            'Unknown bulk action `%s`' % op_type)
+            except TransportError as ex:
+                errors = True
+                status = ex.status_code
+                result = {
+                    '_index': _index, '_type': _type, '_id': _id,
+                    'status': status,
+                    }
+                if op_type == 'delete' and status == 404:
+                    result.update({'found': False, 'result': 'not_found'})
+                else:
+                    result['error'] = (ex.info or {}).get('error', ex.error)
+
+            result['status'] = status
+            items.append({op_type: result})
+
+        return {'took': 0, 'errors': errors, 'items': items}
+
+    def _filter_source(self, source, body, params):
+        includes = params.get('_source_include') or params.get(
+                '_source_includes')
+        excludes = params.get('_source_exclude') or params.get(
+                '_source_excludes')
+        spec = body.get('_source', params.get('_source'))
+
+        if spec is False or spec == 'false':
+            return None
+        if isinstance(spec, dict):
+            includes = spec.get('includes') or spec.get('include')
+            excludes = spec.get('excludes') or spec.get('exclude')
+        elif spec not in (None, True, 'true'):
+            includes = spec
+
+        if not includes and not excludes:
+            return source
+
+        includes = _split_names(includes)
+        excludes = _split_names(excludes)
+
+        def keep(path):
+            if any(fnmatch.fnmatch(path, x) for x in excludes):
+                return False
+            if not includes:
+                return True
+            return any(
+                    fnmatch.fnmatch(path, x) or x.startswith(path + '.')
+                    or path.startswith(x + '.') for x in includes)
+
+        def filtered(data, prefix=''):
+            result = {}
+            for key, value in data.items():
+                path = prefix + key
+                if not keep(path):
+                    continue
+                if isinstance(value, dict):
+                    value = filtered(value, prefix=path + '.')
+                result[key] = value
+            return result
+
+        return filtered(source)
+
+    def _sort_key(self, sort):
+        if not sort:
+            return None
+        if not isinstance(sort, list):
+            sort = [sort]
+
+        keys = []
+        for item in sort:
+            if isinstance(item, six.string_types):
+                field, order = item, 'desc' if item == '_score' else 'asc'
+                if field.startswith('-'):
+                    field, order = field[1:], 'desc'
+            else:
+                (field, options), = item.items()
+                order = options if isinstance(
+                        options, six.string_types) else options.get(
+                                'order', 'asc')
+            keys.append((field, order))
+        return keys
+
+    def _sorted_hits(self, hits, keys):
+        if not keys:
+            return sorted(hits, key=lambda x: -x[2])
+
+        for field, order in reversed(keys):
+            if field == '_doc':
+                continue
+
+            def value(hit, field=field):
+                if field == '_score':
+                    return (0, hit[2])
+                values = get_field_values(hit[1].source, field)
+                if not values:
+                    return (1, None)
+                return (0, min(values) if order == 'asc' else max(values))
+
+            present = [x for x in hits if value(x)[0] == 0]
+            missing = [x for x in hits if value(x)[0] == 1]
+            present.sort(
+                    key=lambda x: value(x)[1], reverse=(order == 'desc'))
+            hits = present + missing
+        return hits
+
+    def _search(self, index=None, doc_type=None, body=None, **params):
+        body = body or {}
+        for key in ('aggs', 'aggregations'):
+            if body.get(key):
+                raise NotImplementedError(
+                        '`%s` is not supported by memory backend' % key)
+
+        ignore_unavailable = six.text_type(
+                params.get('ignore_unavailable', '')).lower() == 'true'
+        indices = self._resolve(index, ignore_unavailable=ignore_unavailable)
+        types = _split_names(doc_type)
+
+        for idx in indices:
+            if idx.closed:
+                raise _error(
+                        RequestError, 400, 'index_closed_exception',
+                        'closed')
+
+        query = body.get('query')
+        post_filter = body.get('post_filter')
+        slice_ = body.get('slice')
+        hits = []
+        for idx in indices:
+            for doc in idx.docs.values():
+                if types and doc.doc_type not in types:
+                    continue
+                if slice_ and _slice_id(
+                        doc.id, slice_['max']) != slice_['id']:
+                    continue
+                score = self.matcher.match(query, doc)
+                if score is None:
+                    continue
+                if post_filter and self.matcher.match(
+                        post_filter, doc) is None:
+                    continue
+                hits.append((idx, doc, score))
+
+        return self._sorted_hits(hits, self._sort_key(body.get('sort')))
+
+    def _format_hit(self, hit, body, params):
+        idx, doc, score = hit
+        result = {
+            '_index': idx.name,
+            '_type': doc.doc_type,
+            '_id': doc.id,
+            '_score': score,
+            }
+        source = self._filter_source(
+                copy.deepcopy(doc.source), body, params)
+        if source is not None:
+            result['_source'] = source
+        if doc.routing is not None:
+            result['_routing'] = doc.routing
+        return result
+
+    def _response(self, hits, total, body, params, **extra):
+        formatted = [self._format_hit(x, body, params) for x in hits]
+        response = {
+            'took': 0,
+            'timed_out': False,
+            '_shards': {'total': 1, 'successful': 1, 'failed': 0},
+            'hits': {
+                'total': total,
+                'max_score': max([x[2] for x in hits]) if hits else None,
+                'hits': formatted,
+                },
+            }
+        response.update(extra)
+        return response
+
+    def _completion_inputs(self, source, field):
+        values = get_field_values(source, field)
+        if not values and '.' in field:
+            # completion multi-field of text field
+            values = get_field_values(source, field.rsplit('.', 1)[0])
+        for value in values:
+            weight = 1
+            if isinstance(value, dict):
+                weight = value.get('weight', 1)
+                value = value.get('input') or []
+            for item in value if isinstance(value, list) else [value]:
+                yield six.text_type(item), weight
+
+    def _profile_node(self, query):
+        (query_type, params), = (query or {'match_all': {}}).items()
+        children = []
+        if query_type == 'bool':
+            for occur in ('must', 'filter', 'should', 'must_not'):
+                clauses = params.get(occur) or []
+                if isinstance(clauses, dict):
+                    clauses = [clauses]
+                children.extend(self._profile_node(x) for x in clauses)
+        return {
+            'type': query_type,
+            'description': json.dumps(params, sort_keys=True),
+            'time_in_nanos': 0,
+            'breakdown': {},
+            'children': children,
+            }
+
+    def _profile(self, index, query):
+        """
+        Profile API response with query tree and zero timings
+        """
+        return {'shards': [{
+            'id': '[memory][%s][0]' % idx.name,
+            'searches': [{
+                'query': [self._profile_node(query)],
+                'rewrite_time': 0,
+                'collector': [],
+                }],
+            'aggregations': [],
+            } for idx in self._resolve(index, ignore_unavailable=True)]}
+
+    def _suggest(self, index, suggest, params):
+        indices = self._resolve(
+                index, ignore_unavailable=six.text_type(
+                    params.get('ignore_unavailable', '')).lower() == 'true')
+        result = {}
+        for name, spec in suggest.items():
+            if 'completion' not in spec:
+                raise NotImplementedError(
+                        'Only completion suggester is supported by memory '
+                        'backend')
+            prefix = six.text_type(spec.get('prefix', spec.get('text', '')))
+            field = spec['completion']['field']
+            size = int(spec['completion'].get('size', 5))
+
+            options = []
+            for idx in indices:
+                for doc in idx.docs.values():
+                    matched = [
+                            (text, weight) for text, weight in
+                            self._completion_inputs(doc.source, field)
+                            if text.lower().startswith(prefix.lower())]
+                    if not matched:
+                        continue
+                    text, weight = max(matched, key=lambda x: x[1])
+                    options.append({
+                        'text': text, '_index': idx.name,
+                        '_type': doc.doc_type, '_id': doc.id,
+                        '_score': float(weight),
+                        '_source': copy.deepcopy(doc.source),
+                        })
+            options.sort(key=lambda x: (-x['_score'], x['text']))
+            result[name] = [{
+                'text': prefix, 'offset': 0, 'length': len(prefix),
+                'options': options[:size],
+                }]
+        return result
+
+    @api
+    def search(self, index=None, doc_type=None, body=None, **params):
+        body = dict(body or {})
+        extra = {}
+        suggest = body.pop('suggest', None)
+        if suggest:
+            extra['suggest'] = self._suggest(index, suggest, params)
+        if body.pop('profile', False):
+            extra['profile'] = self._profile(index, body.get('query'))
+        hits = self._search(
+                index=index, doc_type=doc_type, body=body, **params)
+
+        size = int(params.get('size', body.get('size', 10)))
+        offset = int(params.get('from_', body.get('from', 0)))
+
+        if params.get('scroll'):
+            scroll_id = uuid.uuid4().hex
+            self._scrolls[scroll_id] = (hits[size:], size, body, params)
+            return self._response(
+                    hits[:size], len(hits), body, params,
+                    _scroll_id=scroll_id, **extra)
+
+        return self._response(
+                hits[offset:offset+size], len(hits), body, params, **extra)
+
+    @api
+    def scroll(self, scroll_id=None, body=None, **params):
+        if scroll_id is None and body:
+            scroll_id = body.get('scroll_id')
+        try:
+            hits, size, search_body, search_params = self._scrolls[scroll_id]
+        except KeyError:
+            raise _error(
+                    NotFoundError, 404, 'search_context_missing_exception',
+                    'No search context found for id [%s]' % scroll_id)
+        self._scrolls[scroll_id] = (
+                hits[size:], size, search_body, search_params)
+        return self._response(
+                hits[:size], len(hits), search_body, search_params,
+                _scroll_id=scroll_id)
+
+    @api
+    def clear_scroll(self, scroll_id=None, body=None, **params):
+        ids = _split_names(scroll_id)
+        if body:
+            ids.extend(_split_names(body.get('scroll_id')))
+        for x in ids:
+            self._scrolls.pop(x, None)
+        return {'succeeded': True}
+
+    @api
+    def count(self, index=None, doc_type=None, body=None, **params):
+        body = dict(body or {})
+        body.pop('sort', None)
+        hits = self._search(
+                index=index, doc_type=doc_type, body=body, **params)
+        return {
+            'count': len(hits),
+            '_shards': {'total': 1, 'successful': 1, 'failed': 0}}
+
+    @api
+    def delete_by_query(self, index, body, doc_type=None, **params):
+        hits = self._search(
+                index=index, doc_type=doc_type, body=body, **params)
+        for idx, doc, score in hits:
+            del idx.docs[doc.id]
+        return {'deleted': len(hits), 'total': len(hits), 'failures': []}
+
+    @api
+    def reindex(self, body, **params):
+        source = body.get('source') or {}
+        dest = body.get('dest') or {}
+        hits = self._search(
+                index=source.get('index'), doc_type=source.get('type'),
+                body={'query': source.get('query')})
+        for idx, doc, score in hits:
+            self._index_doc(
+                    dest['index'], dest.get('type') or doc.doc_type,
+                    doc.source, id=doc.id, routing=doc.routing)
+
+        response = {
+            'took': 0, 'timed_out': False, 'total': len(hits),
+            'created': len(hits), 'updated': 0, 'deleted': 0,
+            'batches': 1, 'failures': [],
+            }
+        if six.text_type(params.get('wait_for_completion', True)).lower() \
+                == 'false':
+            task_id = 'memory:%d' % (len(self._tasks) + 1)
+            self._tasks[task_id] = {
+                'completed': True,
+                'task': {'id': task_id, 'action': 'indices:data/write/reindex',
+                         'status': {'total': len(hits),
+                                    'created': len(hits)}},
+                'response': response,
+                }
+            return {'task': task_id}
+        return response
+
+    @api
+    def msearch(self, body, index=None, doc_type=None, **params):
+        lines = self._parse_bulk_body(body)
+        responses = []
+        for header, search_body in zip(lines[::2], lines[1::2]):
+            search_params = dict(params)
+            search_params.update(dict(
+                (k, v) for k, v in header.items()
+                if k not in ('index', 'type')))
+            try:
+                responses.append(self.search(
+                    index=header.get('index', index),
+                    doc_type=header.get('type', doc_type),
+                    body=search_body, **search_params))
+            except TransportError as ex:
+                responses.append({
+                    'error': (ex.info or {}).get('error', ex.error),
+                    'status': ex.status_code})
+        return {'responses': responses}
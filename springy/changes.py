@@ -0,0 +1,74 @@
+import copy
+
+
+INITIAL_VALUES_ATTR = '_springy_initial_values'
+
+# marker of field not loaded from the database
+DEFERRED = object()
+
+
+def depends_on(*field_names):
+    """
+    Declare model fields used by `prepare_<field>()` method, i.e.:
+
+        @springy.depends_on('category', 'category__name')
+        def prepare_category_name(self, obj):
+            return obj.category.name
+
+    Only the first part of related lookups is significant.
+    """
+
+    def decorator(func):
+        func.depends_on = tuple(field_names)
+        return func
+    return decorator
+
+
+def get_update_field_names(model, update_fields):
+    """
+    Normalize `update_fields` (names or attnames) to model field names
+    """
+
+    names = set()
+    for field in model._meta.concrete_fields:
+        if field.name in update_fields or field.attname in update_fields:
+            names.add(field.name)
+    return names
+
+
+def get_tracked_fields(model, field_names):
+    return [
+            x for x in model._meta.concrete_fields if x.name in field_names]
+
+
+def store_initial_values(instance, field_names):
+    """
+    Remember current values of `field_names` of `instance`.
+    Values are copied, so changes of mutable values (lists, dicts of JSON
+    fields) made in place are detected. Deferred fields are not loaded.
+    """
+
+    values = {}
+    for field in get_tracked_fields(type(instance), field_names):
+        value = instance.__dict__.get(field.attname, DEFERRED)
+        values[field.name] = (
+                value if value is DEFERRED else copy.deepcopy(value))
+    instance.__dict__[INITIAL_VALUES_ATTR] = values
+
+
+def get_changed_fields(instance):
+    """
+    Return names of tracked fields changed since `store_initial_values()`
+    or None when initial values were not stored
+    """
+
+    initial = instance.__dict__.get(INITIAL_VALUES_ATTR)
+    if initial is None:
+        return None
+
+    changed = set()
+    for field in get_tracked_fields(type(instance), initial):
+        value = instance.__dict__.get(field.attname, DEFERRED)
+        if value is not DEFERRED and value != initial[field.name]:
+            changed.add(field.name)
+    return changed
@@ -0,0 +1,104 @@
+import io
+import json
+import os
+import time
+import uuid
+
+import six
+
+
+class Checkpoint(object):
+    """
+    Progress of a single `update_index` run
+    """
+
+    def __init__(self, index, run_id=None, last_pk=None, count=0,
+                 updated_at=None):
+        self.index = index
+        self.run_id = run_id or uuid.uuid4().hex
+        self.last_pk = last_pk
+        self.count = count
+        self.updated_at = updated_at
+
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'run_id': self.run_id,
+            'last_pk': self.last_pk,
+            'count': self.count,
+            'updated_at': self.updated_at,
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class FileCheckpointStore(object):
+    """
+    Stores checkpoints as JSON files (one per index) in `path` directory.
+    File names are prefixed with `namespace` (project and database), so
+    projects sharing the directory do not overwrite their checkpoints.
+    Files are replaced atomically, so a checkpoint is never half-written.
+    """
+
+    def __init__(self, path, namespace=None):
+        self.path = path
+        self.namespace = namespace
+
+    def _filename(self, index_name):
+        if self.namespace:
+            index_name = '%s.%s' % (self.namespace, index_name)
+        return os.path.join(self.path, '%s.json' % index_name)
+
+    def load(self, index_name):
+        try:
+            with io.open(self._filename(index_name), encoding='utf-8') as f:
+                return Checkpoint.from_dict(json.load(f))
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self, checkpoint):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        checkpoint.updated_at = time.time()
+        filename = self._filename(checkpoint.index)
+        tmp_filename = '%s.tmp' % filename
+
+        data = json.dumps(checkpoint.to_dict(), default=six.text_type)
+        with io.open(tmp_filename, 'w', encoding='utf-8') as f:
+            f.write(six.text_type(data))
+            f.flush()
+            os.fsync(f.fileno())
+        getattr(os, 'replace', os.rename)(tmp_filename, filename)
+
+    def delete(self, index_name):
+        try:
+            os.remove(self._filename(index_name))
+        except OSError:
+            pass
+
+
+def is_checkpoint_store_configured():
+    from .settings import CHECKPOINT_DIR
+    return bool(CHECKPOINT_DIR)
+
+
+def get_checkpoint_store(database='default'):
+    """
+    Return checkpoint store for indexing from `database` in
+    `SPRINGY_CHECKPOINT_DIR` directory
+    """
+
+    from django.conf import settings
+    from django.core.exceptions import ImproperlyConfigured
+    from .settings import CHECKPOINT_DIR
+
+    if not CHECKPOINT_DIR:
+        raise ImproperlyConfigured(
+                'SPRINGY_CHECKPOINT_DIR must be set to store checkpoints')
+
+    project = getattr(settings, 'SETTINGS_MODULE', None) or 'settings'
+    return FileCheckpointStore(
+            CHECKPOINT_DIR, namespace='%s.%s' % (project, database))
@@ -0,0 +1,128 @@
+from array import array
+
+import six
+
+
+def _get_source_value(source, field):
+    value = source
+    for part in field.split('.'):
+        try:
+            value = value[part]
+        except (KeyError, TypeError):
+            return None
+    return value
+
+
+class CompactHitMeta(object):
+    """
+    Meta data (`id`, `score`, `index`, `sort`) of a compact hit
+    """
+
+    __slots__ = ('_result', '_pos')
+
+    def __init__(self, result, pos):
+        self._result = result
+        self._pos = pos
+
+    @property
+    def id(self):
+        return self._result.ids[self._pos]
+
+    @property
+    def score(self):
+        score = self._result.scores[self._pos]
+        return None if score != score else score  # NaN means no score
+
+    @property
+    def index(self):
+        return self._result.indices[self._pos]
+
+    @property
+    def sort(self):
+        if self._result.sort_values is None:
+            return None
+        return list(self._result.sort_values[self._pos])
+
+
+class CompactHit(object):
+    """
+    Hit materialized on access from `CompactResult` columns
+    """
+
+    __slots__ = ('_result', '_pos')
+
+    def __init__(self, result, pos):
+        self._result = result
+        self._pos = pos
+
+    @property
+    def meta(self):
+        return CompactHitMeta(self._result, self._pos)
+
+    def __getattr__(self, name):
+        try:
+            column = self._result.columns[name]
+        except KeyError:
+            raise AttributeError(name)
+        return column[self._pos]
+
+    def __getitem__(self, name):
+        return self._result.columns[name][self._pos]
+
+    def to_dict(self):
+        return dict(
+                (name, column[self._pos])
+                for name, column in self._result.columns.items())
+
+    def __repr__(self):
+        return '<CompactHit %s/%s>' % (self.meta.index, self.meta.id)
+
+
+class CompactResult(object):
+    """
+    Column-oriented storage of search hits.
+
+    Only ids, scores, index names, sort values and selected source fields
+    are kept; raw response and `Hit` objects are not. Hits are created
+    lazily while iterating or indexing.
+    """
+
+    def __init__(self, response, fields):
+        hits = response['hits']['hits']
+        self.total = response['hits']['total']
+        self.took = response.get('took')
+        self.fields = tuple(fields)
+
+        names = {}
+        self.ids = [hit['_id'] for hit in hits]
+        self.scores = array('d', (
+            float('nan') if hit.get('_score') is None else hit['_score']
+            for hit in hits))
+        self.indices = [
+                names.setdefault(hit['_index'], hit['_index'])
+                for hit in hits]
+        if any('sort' in hit for hit in hits):
+            self.sort_values = [tuple(hit.get('sort') or ()) for hit in hits]
+        else:
+            self.sort_values = None
+        self.columns = dict(
+                (name, [
+                    _get_source_value(hit.get('_source') or {}, name)
+                    for hit in hits])
+                for name in self.fields)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [CompactHit(self, x) for x in range(len(self))[pos]]
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError('hit index out of range')
+        return CompactHit(self, pos)
+
+    def __iter__(self):
+        for pos in six.moves.range(len(self)):
+            yield CompactHit(self, pos)
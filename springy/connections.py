@@ -1,5 +1,29 @@
+from django.utils.module_loading import import_string
 from elasticsearch_dsl import connections
 
 
 def get_connection_for_doctype(doctype, using=None):
     return connections.connections.get_connection(using or 'default')
+
+
+def configure_connections(databases):
+    """
+    Configure connections from `ELASTIC_DATABASES`.
+
+    Connections with a `class` key are instantiated with the dotted
+    path client class (i.e. `springy.backends.memory.MemoryElasticsearch`)
+    and remaining options. Others are passed to Elasticsearch-DSL.
+    """
+
+    custom, default = {}, {}
+    for alias, options in databases.items():
+        options = dict(options)
+        client_class = options.pop('class', None)
+        if client_class:
+            custom[alias] = import_string(client_class)(**options)
+        else:
+            default[alias] = options
+
+    connections.connections.configure(**default)
+    for alias, client in custom.items():
+        connections.connections.add_connection(alias, client)
@@ -0,0 +1,148 @@
+import glob
+import gzip
+import io
+import json
+import os
+import re
+from multiprocessing.pool import ThreadPool
+
+from .connections import get_connection_for_doctype
+
+
+DUMP_META_FIELDS = ('_type', '_id', '_routing')
+
+
+def get_dump_filename(path, index_name, slice_id):
+    return os.path.join(path, '%s.%d.ndjson.gz' % (index_name, slice_id))
+
+
+def get_dump_filenames(path, index_name):
+    name_re = re.compile(r'^%s\.\d+\.ndjson\.gz$' % re.escape(index_name))
+    return sorted(
+            x for x in glob.glob(os.path.join(
+                glob.escape(path) if hasattr(glob, 'escape') else path,
+                '%s.*.ndjson.gz' % index_name))
+            if name_re.match(os.path.basename(x)))
+
+
+def _run_parallel(func, args, jobs):
+    if len(args) < 2:
+        return list(map(func, args))
+    pool = ThreadPool(min(jobs, len(args)))
+    try:
+        return pool.map(func, args, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def hit_to_line(hit, keep_index=False):
+    """
+    Serialize search hit to dump line. Physical index name is kept only
+    when `keep_index` is set (documents of partitioned indices).
+    """
+    data = dict((x, hit[x]) for x in DUMP_META_FIELDS if x in hit)
+    if keep_index:
+        data['_index'] = hit['_index']
+    data['_source'] = hit.get('_source') or {}
+    return (json.dumps(data, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def export_index(
+        index, path, slices=4, chunk_size=1000, scroll='5m', using=None):
+    """
+    Write all documents of `index` to gzipped NDJSON files in `path`
+    directory, one file per scroll slice. Slices are scrolled in
+    parallel. Dump files of previous exports are removed.
+    Returns number of exported documents.
+    """
+
+    from elasticsearch.helpers import scan
+
+    connection = get_connection_for_doctype(
+            index._meta.document, using=using)
+    index_name = index.get_search_index_name()
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    for filename in get_dump_filenames(path, index.name):
+        os.remove(filename)
+
+    def export_slice(slice_id):
+        query = {'query': {'match_all': {}}}
+        if slices > 1:
+            query['slice'] = {'id': slice_id, 'max': slices}
+
+        count = 0
+        filename = get_dump_filename(path, index.name, slice_id)
+        with gzip.open(filename, 'wb') as f:
+            for hit in scan(
+                    connection, query=query, index=index_name,
+                    size=chunk_size, scroll=scroll):
+                f.write(hit_to_line(hit, keep_index=index.is_partitioned))
+                count += 1
+        return count
+
+    return sum(_run_parallel(export_slice, list(range(slices)), slices))
+
+
+def read_dump(filename, partitions_of=None):
+    """
+    Iterate over bulk index actions stored in dump file.
+    Partition names are rewritten to partitions of `partitions_of` index,
+    other physical index names are dropped.
+    """
+
+    with gzip.open(filename, 'rb') as f:
+        for line in io.BufferedReader(f):
+            line = line.strip()
+            if not line:
+                continue
+            action = json.loads(line.decode('utf-8'))
+            action['_op_type'] = 'index'
+            source_index = action.pop('_index', None)
+            if partitions_of and source_index:
+                action['_index'] = '%s-%s' % (
+                        partitions_of, source_index.rsplit('-', 1)[-1])
+            yield action
+
+
+def import_index(
+        index, path, jobs=4, chunk_size=500, request_timeout=30,
+        using=None):
+    """
+    Load documents exported with `export_index()` into `index`.
+
+    Index (or template) is initialized from `Index` definition first.
+    Dump files are streamed into bulk requests in parallel.
+    Returns number of imported documents.
+    """
+
+    from elasticsearch.helpers import bulk
+
+    filenames = get_dump_filenames(path, index.name)
+    if not filenames:
+        raise IOError('No dump files of index `%s` found in `%s`' % (
+            index.name, path))
+
+    index.initialize(using=using)
+
+    connection = get_connection_for_doctype(
+            index._meta.document, using=using)
+    wait_for_active_shards = index._meta.wait_for_active_shards
+    index_name = index._meta.document._doc_type.index
+    partitions_of = index_name if index.is_partitioned else None
+
+    def import_file(filename):
+        return bulk(
+                connection, read_dump(filename, partitions_of=partitions_of),
+                index=index_name,
+                doc_type=index._meta.document._doc_type.name,
+                wait_for_active_shards=wait_for_active_shards,
+                chunk_size=chunk_size, request_timeout=request_timeout,
+                refresh=False)[0]
+
+    count = sum(_run_parallel(import_file, filenames, jobs))
+    connection.indices.refresh(index=index.get_search_index_name())
+    index.invalidate_cache()
+    return count
@@ -9,3 +9,7 @@ class IndexDoesNotExist(Exception):
 
 class FieldDoesNotExist(Exception):
     pass
+
+
+class ReindexError(Exception):
+    pass
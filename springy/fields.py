@@ -1,7 +1,7 @@
 from elasticsearch_dsl import (  # NOQA
         String, Date, Integer, Boolean, Float,
         Short, Byte, Long, Double, Field, Object, Nested,
-        Text, Keyword, HalfFloat, GeoPoint, GeoShape, MetaField)
+        Text, Keyword, HalfFloat, GeoPoint, GeoShape, MetaField, Completion)
 
 
 MODEL_FIELDS_MAP = {
@@ -20,6 +20,18 @@ MODEL_FIELDS_MAP = {
     }
 
 
+class SearchAsYouType(Text):
+    """
+    Text field with `suggest` completion subfield used by `Index.suggest()`
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = dict(kwargs.pop('fields', None) or {})
+        fields.setdefault('suggest', Completion())
+        kwargs['fields'] = fields
+        super(SearchAsYouType, self).__init__(*args, **kwargs)
+
+
 def doctype_field_factory(field, **attrs):
     if getattr(field, 'is_relation', None) or getattr(field, 'related', None):
         if field.many_to_many:
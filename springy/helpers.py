@@ -11,7 +11,7 @@ def query(*indices):
     This helper will instantiate `Search` object to perform further queries.
     """
 
-    indices = map(index_to_string, indices)
+    indices = list(map(index_to_string, indices))
     return Search(index=indices)
 
 
@@ -1,14 +1,31 @@
 from collections import defaultdict
+import time
+import uuid
 import six
 
 from elasticsearch_dsl import Index as DSLIndex
 
 from .connections import get_connection_for_doctype
-from .fields import Field
-from .utils import model_to_dict, generate_index_name, chunked
+from .cache import TTLCache
+from .changes import get_update_field_names, get_changed_fields
+from .fields import Field, Completion, SearchAsYouType
+from .utils import (
+        model_to_dict, generate_index_name, chunked, keyset_chunked,
+        get_model_fields, get_values_columns, values_row_to_dict, ValuesRow,
+        get_pk)
+from .checkpoints import (
+        Checkpoint, get_checkpoint_store, is_checkpoint_store_configured)
 from .search import IterableSearch, MultiSearch
 from .schema import model_doctype_factory, Schema
-from .exceptions import DocumentDoesNotExist, FieldDoesNotExist
+from .exceptions import (
+        DocumentDoesNotExist, IndexDoesNotExist, FieldDoesNotExist,
+        ReindexError)
+from .partitions import (
+        partition_suffix, partition_suffixes, partition_name_re)
+from .throttling import (
+        Throttle, parse_rate, is_rejection, measure_search_latency)
+from .planner import (
+        InitializePlan, build_initialize_plan, unflatten_settings)
 
 try:
     import itertools.imap as map
@@ -54,6 +71,25 @@ class IndicesRegistry(object):
     def get_all(self):
         return list(self._indices.values())
 
+    def get_for_index_name(self, index_name):
+        """
+        Return index class storing documents in physical index
+        `index_name` (name of index, one of its partitions or versions
+        created by `reindex()`)
+        """
+        found, found_name = None, ''
+        for cls in self._indices.values():
+            name = cls._meta.document._doc_type.index
+            if index_name == name:
+                return cls
+            if index_name.startswith('%s-' % name) and len(name) > len(
+                    found_name):
+                found, found_name = cls, name
+        if found is not None:
+            return found
+        raise NotRegisteredError(
+                'No index is registered for `%s`' % index_name)
+
     def get_for_model(self, model):
         return self._model_indices[model][:]  # shallow copy
 
@@ -87,8 +123,24 @@ class IndexOptions(object):
         self.index = getattr(meta, 'index', None)
         self.wait_for_active_shards = getattr(
                 meta, 'wait_for_active_shards', 1)
+        self.use_values = getattr(meta, 'use_values', False)
+        self.values_fields = tuple(getattr(meta, 'values_fields', None) or ())
+        self.routing_field = getattr(meta, 'routing_field', None)
+        self.partition_field = getattr(meta, 'partition_field', None)
+        self.partition_period = getattr(meta, 'partition_period', 'month')
+        self.track_changes = getattr(meta, 'track_changes', False)
+        self.queryset_fields = getattr(meta, 'queryset_fields', None)
+        self.warmup_queries = list(getattr(meta, 'warmup_queries', None) or [])
+        self.forcemerge_segments = getattr(meta, 'forcemerge_segments', None)
+        self.suggest_cache_prefix_length = getattr(
+                meta, 'suggest_cache_prefix_length', 3)
+        self.suggest_cache = TTLCache(
+                maxsize=getattr(meta, 'suggest_cache_size', 1000),
+                ttl=getattr(meta, 'suggest_cache_ttl', 60))
         self._field_names = getattr(meta, 'fields', None) or []
         self._declared_fields = declared_fields
+        self._values_columns = None
+        self._dependency_fields = False  # not computed yet
 
     def setup_doctype(self, meta, index):
         self.document = model_doctype_factory(
@@ -131,6 +183,11 @@ class IndexBase(type):
                 raise FieldDoesNotExist(
                         'Field `%s` is not defined' % fieldname)
 
+        partition_field = new_class._meta.partition_field
+        if partition_field and partition_field not in schema_fields:
+            raise FieldDoesNotExist(
+                    'Partition field `%s` is not defined' % partition_field)
+
         index_name = new_class._meta.index or generate_index_name(new_class)
         registry.register(index_name, new_class)
 
@@ -145,71 +202,319 @@ class Index(object):
         return self._meta.index
 
     def prepare_object(self, obj):
+        if isinstance(obj, dict):
+            return values_row_to_dict(obj, self.get_values_columns())
         return model_to_dict(obj)
 
+    def get_values_columns(self):
+        """
+        Return dict of index fields mapped to `values()` columns
+        """
+        if self._meta._values_columns is None:
+            self._meta._values_columns = get_values_columns(
+                    self.model, self._schema.get_field_names())
+        return self._meta._values_columns
+
+    def get_values_query_set(self, queryset=None):
+        """
+        Return `values()` queryset fetching only mapped columns,
+        primary key and additional `Meta.values_fields`
+        """
+        if queryset is None:
+            queryset = self.get_query_set()
+        columns = self._get_values_column_names()
+        columns.add('pk')
+        return queryset.values(*sorted(columns))
+
+    def _get_values_column_names(self):
+        columns = set(self.get_values_columns().values())
+        columns.update(self._meta.values_fields)
+        if self._meta.routing_field:
+            columns.add(self.get_routing_column())
+        return columns
+
+    def to_values_row(self, obj):
+        """
+        Convert `values()` dict or model instance to `ValuesRow`
+        """
+        if isinstance(obj, dict):
+            return obj if isinstance(obj, ValuesRow) else ValuesRow(obj)
+        if any('__' in x for x in self._meta.values_fields):
+            return ValuesRow(self.get_values_query_set(
+                self.model._default_manager.filter(pk=obj.pk))[0])
+        row = ValuesRow(
+                (x, getattr(obj, x)) for x in self._get_values_column_names())
+        row['pk'] = obj.pk
+        return row
+
+    def to_values_rows(self, objects):
+        """
+        Convert list of `values()` dicts or model instances to `ValuesRow`
+        list. When `Meta.values_fields` contain related lookups, rows
+        of model instances are fetched with one query.
+        """
+        instances = [x for x in objects if not isinstance(x, dict)]
+        rows = {}
+        if instances and any('__' in x for x in self._meta.values_fields):
+            queryset = self.model._default_manager.filter(
+                    pk__in=[x.pk for x in instances])
+            rows = dict(
+                    (x['pk'], ValuesRow(x))
+                    for x in self.get_values_query_set(queryset))
+        return [
+                rows[x.pk] if not isinstance(x, dict) and x.pk in rows
+                else self.to_values_row(x) for x in objects]
+
     def get_query_set(self):
         """
         Return queryset for indexing
         """
         return self.model._default_manager.all()
 
-    def get_search_object(self):
+    @property
+    def is_partitioned(self):
+        return bool(self._meta.partition_field)
+
+    def get_search_index_name(self):
         """
-        Return search object instance
+        Return index name for searching. Partitions of partitioned index
+        are searched through the alias of the same name.
         """
-        return IterableSearch(index=self._meta.document._doc_type.index)
+        return self._meta.document._doc_type.index
 
-    def initialize(self, using=None):
+    def get_template_pattern(self):
         """
-        Initialize / update doctype
+        Return index name pattern of partitions template. Indices created
+        later with names matching the pattern get the template (and the
+        alias) too, so the `<index>-` prefix must not be used elsewhere.
+        """
+        return '%s-*' % self._meta.document._doc_type.index
+
+    def get_partition_name(self, value):
+        """
+        Return name of partition index for date `value`
+        """
+        return '%s-%s' % (
+                self._meta.document._doc_type.index,
+                partition_suffix(value, self._meta.partition_period))
+
+    def get_partition_value(self, obj, data=None):
+        """
+        Return partition field value of `obj` taken from prepared
+        document `data`, `prepare_<field>()` method or the model field
+        """
+        field_name = self._meta.partition_field
+        if data is not None and field_name in data:
+            return data[field_name]
+        prepare = getattr(self, 'prepare_%s' % field_name, None)
+        if prepare is not None:
+            return prepare(obj)
+        return getattr(obj, field_name)
+
+    def get_document_index(self, obj, data=None):
+        """
+        Return name of physical index where `obj` document is stored
+        """
+        if self.is_partitioned:
+            return self.get_partition_name(
+                    self.get_partition_value(obj, data))
+        return self._meta.document._doc_type.index
+
+    @property
+    def is_routed(self):
+        return bool(self._meta.routing_field) or self._is_overridden(
+                'get_routing')
+
+    def get_routing(self, obj):
+        """
+        Return routing key of document representing `obj`.
+        Default implementation returns value of `Meta.routing_field`
+        (raw column value for foreign keys).
+        """
+        if self._meta.routing_field:
+            return getattr(obj, self.get_routing_column())
+        return None
+
+    def get_routing_column(self):
+        """
+        Return attribute (and `values()` column) name of
+        `Meta.routing_field`, i.e. `<name>_id` for foreign keys
+        """
+        field_name = self._meta.routing_field
+        return get_values_columns(self.model, [field_name]).get(
+                field_name, field_name)
+
+    def get_document_meta(self, obj, data=None):
+        """
+        Return document meta (id, index, routing) for model instance.
+        Already prepared document `data` may be passed to avoid
+        preparing the partition field again.
+        """
+        meta = {'id': obj.pk}
+        if self.is_partitioned:
+            # DocType sets default `_index`, which would win over `index`
+            meta['_index'] = self.get_document_index(obj, data)
+        routing = self.get_routing(obj)
+        if routing is not None:
+            meta['routing'] = six.text_type(routing)
+        return meta
+
+    def get_action_meta(self, obj):
+        """
+        Return bulk action meta (`_id`, `_index`, `_routing`)
+        """
+        return dict(
+                ('_%s' % key.lstrip('_'), value)
+                for key, value in self.get_document_meta(obj).items())
+
+    def get_search_object(self, routing=None):
+        """
+        Return search object instance.
+        When `routing` is set, search is limited to shards of that key.
+        """
+        search = IterableSearch(index=self.get_search_index_name())
+        if self.is_partitioned:
+            # the alias does not exist until the first partition is created
+            search = search.params(ignore_unavailable=True)
+        if routing is not None:
+            search = search.params(routing=six.text_type(routing))
+        return search
+
+    def partitions(self, start=None, end=None):
+        """
+        Return search object restricted to partitions touched by
+        <start, end> date range and filtered by partition field.
+        """
+
+        if not self.is_partitioned:
+            raise TypeError('Index `%s` is not partitioned' % self.name)
+
+        date_range = {}
+        if start is not None:
+            date_range['gte'] = start
+        if end is not None:
+            date_range['lte'] = end
+
+        if start is not None and end is not None:
+            index_name = self._meta.document._doc_type.index
+            search = IterableSearch(index=[
+                '%s-%s' % (index_name, x) for x in partition_suffixes(
+                    start, end, self._meta.partition_period)]).params(
+                        ignore_unavailable=True)
+        else:
+            search = self.get_search_object()
+
+        if date_range:
+            search = search.filter(
+                    'range', **{self._meta.partition_field: date_range})
+        return search
+
+    def get_index_settings(self):
+        """
+        Return declared index settings merged with defaults
         """
         from .settings import INDEX_DEFAULTS
         meta = dict(INDEX_DEFAULTS)
         meta.update(self._meta.meta or {})
+        return meta
+
+    def get_dsl_index(self, using=None):
+        _idx = DSLIndex(
+                self._meta.document._doc_type.index,
+                using=using or 'default')
+        _idx.settings(**self.get_index_settings())
+        _idx.doc_type(self._meta.document)
+        return _idx
 
-        _idx = DSLIndex(self._meta.document._doc_type.index)
-        _idx.settings(**meta)
+    def plan_initialize(self, using=None):
+        """
+        Compare live index settings and mapping with declared ones
+        and return `InitializePlan` describing required changes
+        """
+
+        _idx = self.get_dsl_index(using=using)
+        index_name = self._meta.document._doc_type.index
 
         if not _idx.exists():
+            return InitializePlan(index_name, create=True)
+
+        declared = _idx.to_dict()
+        doctype_name = self._meta.document._doc_type.name
+
+        live_settings = list(_idx.get_settings().values())[0]['settings']
+        live_mappings = list(_idx.get_mapping().values())[0]['mappings']
+
+        return build_initialize_plan(
+                index_name, live_settings, declared.get('settings'),
+                live_mapping=live_mappings.get(doctype_name),
+                declared_mapping=declared['mappings'][doctype_name])
+
+    def initialize(self, using=None, dry_run=False):
+        """
+        Initialize / update doctype
+
+        Only changed settings are applied. Dynamic settings are updated
+        online and the index is closed only when analysis or static
+        settings were changed. Returns `InitializePlan` instance, which
+        is not applied when `dry_run` is set.
+        """
+
+        if self.is_partitioned:
+            return self.initialize_template(using=using, dry_run=dry_run)
+
+        plan = self.plan_initialize(using=using)
+
+        if dry_run:
+            return plan
+
+        _idx = self.get_dsl_index(using=using)
+
+        if plan.create:
             _idx.create()
-        else:
-            static_settings = [
-                    'number_of_shards', 'codec', 'routing_partition_size']
-            not_updateable = [
-                    'number_of_shards',
-                    ]
-
-            def filter_out_not_updateable(settings):
-                return dict(filter(
-                    lambda x: x[0] not in not_updateable,
-                    settings.items()))
-
-            idx_dict = _idx.to_dict()
-            idx_settings = idx_dict.get('settings') or {}
-            idx_analysis = idx_settings.pop('analysis') or {}
-            idx_static = dict(map(
-                lambda x: (x, idx_settings.pop(x)),
-                list(filter(
-                    lambda x: x in static_settings, idx_settings))))
-
-            idx_settings = filter_out_not_updateable(idx_settings)
-            idx_static = filter_out_not_updateable(idx_static)
-
-            if idx_settings:
-                _idx.put_settings(body=idx_settings, preserve_existing=True)
+            return plan
 
+        if plan.dynamic_settings:
+            _idx.put_settings(body=plan.dynamic_settings)
+
+        if plan.requires_close:
+            body = dict(plan.static_settings)
+            body.update(unflatten_settings({
+                'analysis.%s' % key: value
+                for key, value in plan.analysis.items()}))
             try:
                 _idx.close()
-                _idx.put_settings(
-                        body={'analysis': idx_analysis},
-                        preserve_existing=True)
-                if idx_static:
-                    _idx.put_settings(body=idx_static, preserve_existing=True)
+                _idx.put_settings(body=body)
             finally:
                 _idx.open()
 
+        # put mapping is idempotent and also applies changed parameters
+        # of existing fields, which are not compared by the planner
         self._meta.document.init(using=using)
 
+        return plan
+
+    def initialize_template(self, using=None, dry_run=False):
+        """
+        Put index template used by partitions of partitioned index.
+        Already existing partitions are not changed.
+        """
+
+        index_name = self._meta.document._doc_type.index
+        plan = InitializePlan(
+                index_name, template=self.get_template_pattern())
+
+        if dry_run:
+            return plan
+
+        body = self.get_dsl_index(using=using).to_dict()
+        body['template'] = self.get_template_pattern()
+        body['aliases'] = {index_name: {}}
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        connection.indices.put_template(name=index_name, body=body)
+        return plan
+
     def create(self, datadict, meta=None):
         """
         Create document instance based on arguments
@@ -224,9 +529,10 @@ class Index(object):
 
     def query(self, *args, **kw):
         """
-        Query index
+        Query index (optionally limited with `routing` key)
         """
-        return self.get_search_object().query(*args, **kw)
+        routing = kw.pop('routing', None)
+        return self.get_search_object(routing=routing).query(*args, **kw)
 
     def query_string(self, query):
         """
@@ -238,15 +544,16 @@ class Index(object):
 
     def filter(self, *args, **kw):
         """
-        Filter index
+        Filter index (optionally limited with `routing` key)
         """
-        return self.get_search_object().filter(*args, **kw)
+        routing = kw.pop('routing', None)
+        return self.get_search_object(routing=routing).filter(*args, **kw)
 
-    def all(self):
+    def all(self, routing=None):
         """
         Return all documents query
         """
-        return self.get_search_object()
+        return self.get_search_object(routing=routing)
 
     def multisearch(self, queries=None):
         """
@@ -254,19 +561,263 @@ class Index(object):
         """
         return MultiSearch(self, queries=queries)
 
+    def get_suggest_field(self):
+        """
+        Return name of the first completion field (or `suggest` subfield
+        of `SearchAsYouType` field) of the index
+        """
+        properties = self._meta.document._doc_type.mapping.properties
+        for name, field in sorted(properties.properties._d_.items()):
+            if isinstance(field, SearchAsYouType):
+                return '%s.suggest' % name
+            if isinstance(field, Completion):
+                return name
+        raise FieldDoesNotExist(
+                'Index `%s` has no completion field' % self.name)
+
+    def suggest(self, prefix, field=None, size=10, using=None):
+        """
+        Return list of `(text, id)` completion suggestions for `prefix`.
+
+        Results for prefixes not longer than
+        `Meta.suggest_cache_prefix_length` are cached in process for
+        `Meta.suggest_cache_ttl` seconds. The cache is cleared by every
+        write made through this index.
+        """
+
+        field = field or self.get_suggest_field()
+        key = (field, prefix, size)
+        cacheable = len(prefix) <= self._meta.suggest_cache_prefix_length
+
+        if cacheable:
+            cached = self._meta.suggest_cache.get(key)
+            if cached is not None:
+                return list(cached)
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        response = connection.search(
+                index=self.get_search_index_name(),
+                body={
+                    'size': 0,
+                    '_source': False,
+                    'suggest': {
+                        'suggestions': {
+                            'prefix': prefix,
+                            'completion': {'field': field, 'size': size},
+                            },
+                        },
+                    })
+
+        suggestions = tuple(
+                (x['text'], x['_id'])
+                for x in response['suggest']['suggestions'][0]['options'])
+        if cacheable:
+            self._meta.suggest_cache.set(key, suggestions)
+        return list(suggestions)
+
+    def invalidate_cache(self):
+        """
+        Clear in-process caches of index data (i.e. suggestions)
+        """
+        self._meta.suggest_cache.clear()
+
     def to_doctype(self, obj):
         """
-        Convert model instance to ElasticSearch document
+        Convert model instance to ElasticSearch document.
+        When index is built from `values()` rows, `obj` is converted
+        to `ValuesRow`, which is passed to `prepare_<field>()` methods.
         """
+        if self._meta.use_values:
+            obj = self.to_values_row(obj)
         data = self.prepare_object(obj)
         for field_name in self._meta._field_names:
             prepared_field_name = 'prepare_%s' % field_name
             if hasattr(self, prepared_field_name):
                 data[field_name] = getattr(self, prepared_field_name)(obj)
-        meta = {'id': obj.pk}
-        return self.create(data, meta=meta)
+        return self.create(data, meta=self.get_document_meta(obj, data))
+
+    def get_prepared_field_names(self):
+        """
+        Return names of fields having `prepare_<field>()` methods
+        """
+        return [
+                x for x in self._meta._field_names
+                if hasattr(self, 'prepare_%s' % x)]
+
+    def _is_overridden(self, name):
+        return six.get_unbound_function(getattr(type(self), name)) is not (
+                six.get_unbound_function(getattr(Index, name)))
+
+    def get_dependency_fields(self):
+        """
+        Return set of model field names which values affect the document
+        (mapped model fields, `depends_on` of `prepare_<field>()` methods,
+        routing, partition and `Meta.queryset_fields`), or None when they
+        can not be determined.
+
+        Indices with custom `get_query_set()` must declare fields used by
+        the queryset filters in `Meta.queryset_fields`. Custom
+        `prepare_object()`, `get_routing()` or `get_document_meta()`
+        may read any field, so dependencies of such indices are unknown.
+        """
+
+        if self._meta._dependency_fields is not False:
+            return self._meta._dependency_fields
+
+        model_fields = set(
+                x.name for x in self.model._meta.concrete_fields)
+        # attnames (`<name>_id`) are normalized to field names, as reported
+        # by `get_update_field_names()` and `get_changed_fields()`
+        field_names = dict(
+                (x.attname, x.name) for x in self.model._meta.concrete_fields)
+
+        def compute():
+            if any(map(self._is_overridden, (
+                    'prepare_object', 'get_routing', 'get_document_meta'))):
+                return None
+            if self._is_overridden('get_query_set') and (
+                    self._meta.queryset_fields is None):
+                return None
+
+            names = set(self._meta.queryset_fields or ())
+            names.update(self._meta.values_fields)
+            names.update(
+                    x for x in (
+                        self._meta.routing_field, self._meta.partition_field)
+                    if x)
+
+            for name in self._schema.get_field_names():
+                prepare = getattr(self, 'prepare_%s' % name, None)
+                if prepare is not None:
+                    depends = getattr(prepare, 'depends_on', None)
+                    if depends is None:
+                        return None
+                    names.update(depends)
+                elif name in model_fields:
+                    names.add(name)
+                else:
+                    return None
+            return frozenset(
+                    field_names.get(x, x)
+                    for x in (y.split('__')[0] for y in names))
+
+        self._meta._dependency_fields = compute()
+        return self._meta._dependency_fields
+
+    def is_affected(self, obj, update_fields=None):
+        """
+        Check if saving `obj` may change its document. Uses `update_fields`
+        or fields changed since load (when `Meta.track_changes` is set).
+        """
+
+        dependencies = self.get_dependency_fields()
+        if dependencies is None:
+            return True
+
+        if update_fields:
+            changed = get_update_field_names(self.model, update_fields)
+        else:
+            changed = get_changed_fields(obj)
+            if changed is None:
+                return True
+        return bool(changed & dependencies)
+
+    def to_partial_doc(self, obj, fields):
+        """
+        Convert model instance to partial document (dict) containing
+        only specified `fields`. Empty values are sent as nulls.
+        """
+
+        schema_fields = self._schema.get_field_names()
+        for field_name in fields:
+            if field_name not in schema_fields:
+                raise FieldDoesNotExist(
+                        'Field `%s` is not defined' % field_name)
+
+        if self._meta.use_values:
+            obj = self.to_values_row(obj)
+            model_fields = ()
+        else:
+            model_fields = set(x.name for x in get_model_fields(obj))
+
+        prepared = self.get_prepared_field_names()
+        to_prepare = [x for x in fields if x not in prepared]
+
+        if not to_prepare:
+            data = {}
+        elif all(x in model_fields for x in to_prepare):
+            data = model_to_dict(obj, fields=to_prepare)
+        else:
+            data = dict(
+                    (k, v) for k, v in self.prepare_object(obj).items()
+                    if k in to_prepare)
+
+        for field_name in fields:
+            if field_name in prepared:
+                data[field_name] = getattr(
+                        self, 'prepare_%s' % field_name)(obj)
+
+        partial = {}
+        if any(x is not None for x in data.values()):
+            partial = self.create(data, meta={'id': obj.pk}).to_dict()
+        for field_name in fields:
+            partial.setdefault(field_name, None)
+        return partial
+
+    def update_fields(
+            self, objects, fields, using=None, wait_for_active_shards=None,
+            chunk_size=100, request_timeout=30, refresh=True):
+        """
+        Update only specified `fields` of documents representing `objects`
+        using bulk partial updates. Documents must already exist.
+        """
+
+        from elasticsearch.helpers import bulk
+
+        fields = list(fields)
+
+        def generate_actions():
+            for chunk in chunked(objects, chunk_size):
+                if self._meta.use_values:
+                    chunk = self.to_values_rows(chunk)
+                for obj in chunk:
+                    action = self.get_action_meta(obj)
+                    action['_op_type'] = 'update'
+                    action['doc'] = self.to_partial_doc(obj, fields)
+                    yield action
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
 
-    def delete(self, obj, fail_silently=False):
+        wait_for_active_shards = (
+                wait_for_active_shards or self._meta.wait_for_active_shards)
+
+        result = bulk(
+                connection, generate_actions(),
+                index=self._meta.document._doc_type.index,
+                doc_type=self._meta.document._doc_type.name,
+                wait_for_active_shards=wait_for_active_shards,
+                refresh=refresh, chunk_size=chunk_size,
+                request_timeout=request_timeout)[0]
+        self.invalidate_cache()
+        return result
+
+    def has_document(self, obj, using=None):
+        """
+        Check if document representing `obj` instance exists
+        """
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        routing = self.get_routing(obj)
+        params = {} if routing is None else {
+                'routing': six.text_type(routing)}
+        return connection.exists(
+                index=self.get_document_index(obj),
+                doc_type=self._meta.document._doc_type.name, id=obj.pk,
+                **params)
+
+    def delete(self, obj, fail_silently=False, using=None):
         """
         Delete document that represents specified `obj` instance.
 
@@ -276,29 +827,151 @@ class Index(object):
         """
 
         from elasticsearch.exceptions import NotFoundError
-        doc = self.to_doctype(obj)
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        doctype_name = self._meta.document._doc_type.name
 
         try:
-            doc.delete()
+            routing = self.get_routing(obj)
+            params = {} if routing is None else {
+                    'routing': six.text_type(routing)}
+            connection.delete(
+                    index=self.get_document_index(obj),
+                    doc_type=doctype_name, id=obj.pk, **params)
         except NotFoundError:
             if not fail_silently:
                 raise DocumentDoesNotExist(
                     'Document `%s` (id=%s) does not exists in index `%s`' % (
-                        doc._doc_type.name, doc.meta.id, self.name))
+                        doctype_name, obj.pk, self.name))
+        else:
+            self.invalidate_cache()
+
+    def delete_many(
+            self, objects, fail_silently=False, using=None,
+            wait_for_active_shards=None, chunk_size=500, request_timeout=30,
+            refresh=True):
+        """
+        Delete documents of specified model instances or primary keys
+        using bulk requests. Returns number of deleted documents.
+
+        Raise DocumentDoesNotExist exception when some documents do not
+        exist, unless `fail_silently` is set.
+        """
+
+        def document_to_action(x):
+            if not hasattr(x, 'pk'):
+                if self.is_partitioned or self.is_routed:
+                    raise ValueError(
+                            'Documents of partitioned or routed index `%s` '
+                            'can be deleted only by model instances'
+                            % self.name)
+                return {'_op_type': 'delete', '_id': x}
+            action = self.get_action_meta(x)
+            action['_op_type'] = 'delete'
+            return action
+
+        return self.delete_actions(
+                map(document_to_action, objects),
+                fail_silently=fail_silently, using=using,
+                wait_for_active_shards=wait_for_active_shards,
+                chunk_size=chunk_size, request_timeout=request_timeout,
+                refresh=refresh)
+
+    def delete_actions(
+            self, actions, fail_silently=False, using=None,
+            wait_for_active_shards=None, chunk_size=500, request_timeout=30,
+            refresh=True):
+        """
+        Send bulk delete `actions` (dicts with `_id` and optional `_index`
+        and `_routing` keys). Returns number of deleted documents.
+        """
+
+        from elasticsearch.helpers import streaming_bulk, BulkIndexError
+
+        def prepare_action(x):
+            x = dict(x)
+            x['_op_type'] = 'delete'
+            return x
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        doctype_name = self._meta.document._doc_type.name
+
+        wait_for_active_shards = (
+                wait_for_active_shards or self._meta.wait_for_active_shards)
+
+        results = streaming_bulk(
+                connection, map(prepare_action, actions),
+                index=self._meta.document._doc_type.index,
+                doc_type=doctype_name,
+                wait_for_active_shards=wait_for_active_shards,
+                refresh=refresh, chunk_size=chunk_size,
+                request_timeout=request_timeout, raise_on_error=False)
+
+        deleted, missing, errors = 0, [], []
+        for ok, item in results:
+            if ok:
+                deleted += 1
+            elif item['delete'].get('status') == 404:
+                missing.append(item['delete'].get('_id'))
+            else:
+                errors.append(item)
+
+        self.invalidate_cache()
+
+        if errors:
+            raise BulkIndexError(
+                    '%i document(s) failed to delete.' % len(errors), errors)
+
+        if missing and not fail_silently:
+            raise DocumentDoesNotExist(
+                'Documents `%s` (ids=%s) do not exist in index `%s`' % (
+                    doctype_name, ', '.join(map(str, missing)), self.name))
+
+        return deleted
+
+    def delete_queryset(self, queryset, **kwargs):
+        """
+        Delete documents of all objects from `queryset`.
+        Primary keys are streamed directly into bulk delete requests.
+        Partitioned and routed indices load only partition and routing
+        fields, unless they are prepared (then full instances are loaded).
+        """
+
+        if self._is_overridden('get_routing'):
+            return self.delete_many(queryset.iterator(), **kwargs)
+        if self.is_partitioned or self.is_routed:
+            fields = [
+                    x for x in (
+                        self._meta.partition_field, self._meta.routing_field)
+                    if x]
+            model_fields = set(
+                    x.name for x in self.model._meta.concrete_fields)
+            if any(x not in model_fields or hasattr(self, 'prepare_%s' % x)
+                   for x in fields):
+                return self.delete_many(queryset.iterator(), **kwargs)
+            return self.delete_many(
+                    queryset.only('pk', *fields).iterator(), **kwargs)
+        return self.delete_many(
+                queryset.values_list('pk', flat=True).iterator(), **kwargs)
 
     def save(self, obj, force=False):
         doc = self.to_doctype(obj)
         doc.save()
+        self.invalidate_cache()
 
     def save_many(
             self, objects, using=None, wait_for_active_shards=None,
-            chunk_size=100, request_timeout=30):
+            chunk_size=100, request_timeout=30, refresh=True, throttle=None):
 
         from elasticsearch.helpers import bulk
 
         def generate_qs():
             chunks = chunked(objects, chunk_size)
             for chunk in chunks:
+                if self._meta.use_values:
+                    chunk = self.to_values_rows(chunk)
                 for item in chunk:
                     yield self.to_doctype(item)
 
@@ -319,23 +992,72 @@ class Index(object):
             return data
 
         actions = map(document_to_action, generate_qs())
+        if throttle is not None:
+            actions = throttle.throttled(
+                    actions, serializer=connection.transport.serializer)
 
-        return bulk(
+        result = bulk(
                 connection, actions, index=index_name, doc_type=doctype_name,
-                wait_for_active_shards=wait_for_active_shards, refresh=True,
-                chunk_size=chunk_size, request_timeout=request_timeout)[0]
+                wait_for_active_shards=wait_for_active_shards,
+                refresh=refresh, chunk_size=chunk_size,
+                request_timeout=request_timeout)[0]
+        self.invalidate_cache()
+        return result
 
     def update(self, obj, **kwargs):
         """
-        Perform create/update document only if matching indexing queryset
+        Perform create/update document only if matching indexing queryset.
+        Returns False when the object does not match it.
         """
 
         try:
             obj = self.get_query_set().filter(pk=obj.pk)[0]
         except IndexError:
-            pass
-        else:
-            self.save(obj, **kwargs)
+            return False
+        self.save(obj, **kwargs)
+        return True
+
+    def update_many(
+            self, objects, using=None, wait_for_active_shards=None,
+            chunk_size=100, request_timeout=30, refresh=True):
+        """
+        Batched `update()`: index objects matching indexing queryset and
+        delete documents of objects which no longer match it.
+
+        Membership is checked with one `pk__in` query per chunk.
+        Returns tuple of indexed and deleted documents counts.
+        """
+
+        kwargs = {
+            'using': using,
+            'wait_for_active_shards': wait_for_active_shards,
+            'request_timeout': request_timeout,
+            'refresh': refresh,
+            }
+
+        if not hasattr(objects, '__getitem__'):
+            objects = list(objects)
+
+        indexed, deleted = 0, 0
+        for chunk in chunked(objects, chunk_size):
+            queryset = self.get_query_set().filter(
+                    pk__in=[get_pk(x) for x in chunk])
+            if self._meta.use_values:
+                queryset = self.get_values_query_set(queryset)
+            matching = list(queryset)
+
+            if matching:
+                indexed += self.save_many(
+                        matching, chunk_size=chunk_size, **kwargs)
+
+            matching_pks = set(get_pk(x) for x in matching)
+            stale = [x for x in chunk if get_pk(x) not in matching_pks]
+            if stale:
+                deleted += self.delete_many(
+                        stale, fail_silently=True, chunk_size=chunk_size,
+                        **kwargs)
+
+        return indexed, deleted
 
     def update_queryset(self, queryset, **kwargs):
         """
@@ -343,23 +1065,118 @@ class Index(object):
         """
         qs = self.get_query_set()
         qs.query.combine(queryset.query, 'and')
+        if self._meta.use_values:
+            qs = self.get_values_query_set(qs)
         return self.save_many(qs, **kwargs)
 
     def update_index(
             self, using=None, wait_for_active_shards=None, chunk_size=100,
-            request_timeout=30):
-        self.save_many(
-                self.get_query_set(), using=using,
-                wait_for_active_shards=wait_for_active_shards,
-                chunk_size=chunk_size,
-                request_timeout=request_timeout)
+            request_timeout=30, resume=False, max_rate=None,
+            max_latency=None, warm=True):
+        """
+        Index whole indexing queryset in chunks ordered by primary key.
+        The index is warmed up (see `warm()`) when `warm` is set.
+
+        A checkpoint is stored after every acknowledged chunk when
+        `SPRINGY_CHECKPOINT_DIR` is set. When `resume` is set (requires
+        the setting), indexing continues after the last checkpointed
+        primary key of an interrupted run.
+
+        `max_rate` limits throughput to documents/sec (number) or
+        bytes/sec (e.g. `'5mb'`). The rate is lowered automatically when
+        bulk requests are rejected or search latency exceeds
+        `max_latency` seconds.
+        """
+
+        if self._meta.use_values:
+            queryset = self.get_values_query_set()
+        else:
+            queryset = self.get_query_set()
+
+        store = None
+        if resume or is_checkpoint_store_configured():
+            store = get_checkpoint_store(database=queryset.db)
+        checkpoint = store.load(self.name) if resume else None
+        if checkpoint is None:
+            checkpoint = Checkpoint(self.name)
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+
+        throttle = None
+        if max_rate:
+            rate, unit = parse_rate(max_rate)
+            throttle = Throttle(rate, unit=unit, max_latency=max_latency)
+
+        for chunk in keyset_chunked(
+                queryset, chunk_size, after=checkpoint.last_pk):
+            kwargs = {
+                'using': using,
+                'wait_for_active_shards': wait_for_active_shards,
+                'chunk_size': chunk_size,
+                'request_timeout': request_timeout,
+                'refresh': False,
+                }
+            if throttle is None:
+                checkpoint.count += self.save_many(chunk, **kwargs)
+            else:
+                checkpoint.count += self._save_throttled(
+                        chunk, throttle, connection, **kwargs)
+            checkpoint.last_pk = get_pk(chunk[-1])
+            if store is not None:
+                store.save(checkpoint)
+
+        connection.indices.refresh(
+                index=self.get_search_index_name(), ignore=404)
+        if store is not None:
+            store.delete(self.name)
+        if warm:
+            self.warm(using=using, request_timeout=request_timeout)
+        return checkpoint.count
+
+    def _save_throttled(self, objects, throttle, connection, **kwargs):
+        from elasticsearch.exceptions import TransportError
+        from elasticsearch.helpers import BulkIndexError
+
+        attempt = 0
+        while True:
+            try:
+                count = self.save_many(objects, throttle=throttle, **kwargs)
+            except (TransportError, BulkIndexError) as ex:
+                if not is_rejection(ex) or attempt >= throttle.max_retries:
+                    raise
+                throttle.backoff(attempt)
+                attempt += 1
+                continue
+
+            latency = None
+            if throttle.max_latency is not None:
+                latency = measure_search_latency(
+                        connection, self.get_search_index_name())
+            throttle.observe(latency=latency)
+            return count
 
     def clear_index(self, using=None, wait_for_active_shards=None):
+        """
+        Remove all documents from index.
+        Partitioned indices are cleared by dropping all partitions.
+        """
+
         from elasticsearch.helpers import scan, bulk
         connection = get_connection_for_doctype(
                 self._meta.document, using=using)
-        objs = scan(connection, _source_include=['__non_existent_field__'])
+
+        if self.is_partitioned:
+            partitions = self.get_partitions(using=using)
+            if partitions:
+                connection.indices.delete(index=','.join(partitions))
+            self.invalidate_cache()
+            return
+
         index_name = self._meta.document._doc_type.index
+        objs = scan(
+                connection, index=index_name,
+                _source_include=['__non_existent_field__'])
 
         def document_to_action(x):
             x['_op_type'] = 'delete'
@@ -371,9 +1188,196 @@ class Index(object):
         bulk(
             connection, actions, index=index_name, refresh=True,
             wait_for_active_shards=wait_for_active_shards)
+        self.invalidate_cache()
 
     def drop_index(self, using=None):
         from elasticsearch.client.indices import IndicesClient
         connection = get_connection_for_doctype(
                 self._meta.document, using=using)
+        self.invalidate_cache()
+        if self.is_partitioned:
+            partitions = self.get_partitions(using=using)
+            connection.indices.delete_template(
+                    name=self._meta.index, ignore=404)
+            if partitions:
+                return connection.indices.delete(index=','.join(partitions))
+            return
         return IndicesClient(connection).delete(self._meta.index)
+
+    def get_partitions(self, using=None):
+        """
+        Return sorted names of existing partition indices.
+        Other indices matching the template pattern are skipped.
+        """
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        name_re = partition_name_re(
+                self._meta.document._doc_type.index,
+                self._meta.partition_period)
+        return sorted(
+                x for x in connection.indices.get_settings(
+                    index=self.get_template_pattern(), ignore=404) or []
+                if name_re.match(x))
+
+    def drop_partitions(self, before, using=None):
+        """
+        Drop partition indices holding only documents older
+        than `before` date. Returns names of dropped indices.
+        """
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        current = self.get_partition_name(before)
+        to_drop = [
+                x for x in self.get_partitions(using=using) if x < current]
+        if to_drop:
+            connection.indices.delete(index=','.join(to_drop))
+            self.invalidate_cache()
+        return to_drop
+
+    def get_warmup_queries(self):
+        """
+        Return list of search bodies (dicts or `Search` objects) run by
+        `warm()`. Defaults to `Meta.warmup_queries`.
+        """
+        return self._meta.warmup_queries
+
+    def warm(self, index=None, using=None, max_num_segments=None,
+             request_timeout=30):
+        """
+        Prepare index for traffic: optionally force-merge segments
+        (`max_num_segments`, defaults to `Meta.forcemerge_segments`)
+        and run warm-up queries against `index` (physical index name,
+        current index by default). Returns list of queries `took` times.
+        """
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        index = index or self.get_search_index_name()
+
+        if max_num_segments is None:
+            max_num_segments = self._meta.forcemerge_segments
+        if max_num_segments:
+            connection.indices.forcemerge(
+                    index=index, max_num_segments=max_num_segments,
+                    request_timeout=request_timeout)
+
+        took = []
+        for query in self.get_warmup_queries():
+            body = query.to_dict() if hasattr(query, 'to_dict') else query
+            response = connection.search(
+                    index=index, body=body, request_cache='true',
+                    request_timeout=request_timeout)
+            took.append(response.get('took'))
+        return took
+
+    def get_versioned_index_name(self):
+        """
+        Return unique name of a new physical index used by `reindex()`
+        """
+        return '%s-%s-%s' % (
+                self._meta.document._doc_type.index,
+                time.strftime('%Y%m%d%H%M%S'), uuid.uuid4().hex[:6])
+
+    def reindex(
+            self, using=None, slices=5, poll_interval=5, request_timeout=30,
+            delete_old=True, progress=None, warm=True):
+        """
+        Copy documents to a new index created from the current definition
+        using server-side `_reindex` API (without reading the database)
+        and point the index name alias to it. The new index is warmed up
+        (see `warm()`) before the alias is switched when `warm` is set.
+
+        The reindex task is polled every `poll_interval` seconds and its
+        status is passed to `progress` callable. Old physical indices are
+        deleted when `delete_old` is set. Returns name of the new index.
+        """
+
+        if self.is_partitioned:
+            raise ValueError(
+                    'Partitioned index `%s` can not be reindexed' % self.name)
+
+        connection = get_connection_for_doctype(
+                self._meta.document, using=using)
+        alias = self._meta.document._doc_type.index
+
+        if connection.indices.exists_alias(name=alias):
+            old_indices = sorted(connection.indices.get_alias(name=alias))
+        elif connection.indices.exists(index=alias):
+            old_indices = None
+        else:
+            raise IndexDoesNotExist('Index `%s` does not exist' % alias)
+
+        new_index = self.get_versioned_index_name()
+        connection.indices.create(
+                index=new_index,
+                body=self.get_dsl_index(using=using).to_dict(),
+                request_timeout=request_timeout)
+
+        task = connection.reindex(
+                body={
+                    'source': {'index': alias},
+                    'dest': {'index': new_index},
+                    },
+                slices=slices, refresh=True, wait_for_completion=False,
+                request_timeout=request_timeout)
+
+        while True:
+            result = connection.tasks.get(
+                    task_id=task['task'], request_timeout=request_timeout)
+            if progress is not None:
+                progress(result['task'].get('status') or {})
+            if result.get('completed'):
+                break
+            time.sleep(poll_interval)
+
+        response = result.get('response') or {}
+        failures = response.get('failures') or []
+        if result.get('error') or failures:
+            connection.indices.delete(index=new_index, ignore=404)
+            raise ReindexError(
+                    'Reindex of `%s` failed: %s' % (
+                        alias, result.get('error') or failures[0]))
+
+        if old_indices is None:
+            # concrete index is replaced by the alias in one request
+            actions = [
+                {'add': {'index': new_index, 'alias': alias}},
+                {'remove_index': {'index': alias}},
+                ]
+        else:
+            actions = [{'add': {'index': new_index, 'alias': alias}}]
+            actions.extend(
+                    {'remove': {'index': x, 'alias': alias}}
+                    for x in old_indices)
+        if warm:
+            self.warm(
+                    index=new_index, using=using,
+                    request_timeout=request_timeout)
+
+        connection.indices.update_aliases(
+                body={'actions': actions}, request_timeout=request_timeout)
+        self.invalidate_cache()
+
+        if delete_old and old_indices:
+            connection.indices.delete(
+                    index=','.join(old_indices),
+                    request_timeout=request_timeout)
+
+        return new_index
+
+    def export_index(self, path, **kwargs):
+        """
+        Dump documents to gzipped NDJSON files in `path` directory
+        (see `springy.dumps.export_index`)
+        """
+        from .dumps import export_index
+        return export_index(self, path, **kwargs)
+
+    def import_index(self, path, **kwargs):
+        """
+        Load documents dumped with `export_index()` from `path` directory
+        (see `springy.dumps.import_index`)
+        """
+        from .dumps import import_index
+        return import_index(self, path, **kwargs)
@@ -1,3 +1,6 @@
+import time
+from multiprocessing.pool import ThreadPool
+
 import six
 from django.core.management.base import BaseCommand, CommandError
 
@@ -23,6 +26,39 @@ class Command(BaseCommand):
         parser.add_argument(
                 '-c', '--chunk-size', default=100, type=int,
                 help='Chunk size')
+        parser.add_argument(
+                '--plan', default=False, action='store_true',
+                help='Show changes without applying them (initialize)')
+        parser.add_argument(
+                '-j', '--jobs', default=4, type=int,
+                help='Number of indices processed concurrently')
+        parser.add_argument(
+                '--resume', default=False, action='store_true',
+                help='Continue interrupted update from last checkpoint '
+                     '(requires SPRINGY_CHECKPOINT_DIR)')
+        parser.add_argument(
+                '--max-rate', default=None, type=str,
+                help='Limit indexing rate to documents/sec (e.g. 500) '
+                     'or bytes/sec (e.g. 5mb) (update)')
+        parser.add_argument(
+                '--max-latency', default=None, type=float,
+                help='Slow down indexing when search latency exceeds '
+                     'this number of milliseconds (update)')
+        parser.add_argument(
+                '--max-segments', default=None, type=int,
+                help='Force-merge index to this number of segments (warm)')
+        parser.add_argument(
+                '--path', default='.', type=str,
+                help='Directory of dump files (export, import)')
+        parser.add_argument(
+                '--slices', default=4, type=int,
+                help='Number of parallel slices (export, reindex)')
+        parser.add_argument(
+                '--follow', default=False, action='store_true',
+                help='Keep consuming outbox entries (consume)')
+        parser.add_argument(
+                '--interval', default=1.0, type=float,
+                help='Seconds to wait for new outbox entries (consume)')
 
     def handle(self, **kw):
 
@@ -31,6 +67,24 @@ class Command(BaseCommand):
         no_confirm = kw['noconfirm']
         self.timeout = kw['timeout']
         self.chunk_size = kw['chunk_size']
+        self.plan = kw['plan']
+        self.jobs = max(kw['jobs'], 1)
+        self.resume = kw['resume']
+        self.follow = kw['follow']
+        self.path = kw['path']
+        self.max_segments = kw['max_segments']
+        self.max_rate = kw['max_rate']
+        if self.max_rate:
+            from springy.throttling import parse_rate
+            try:
+                parse_rate(self.max_rate)
+            except ValueError as ex:
+                raise CommandError(six.text_type(ex))
+        self.max_latency = (
+                kw['max_latency'] / 1000.0
+                if kw['max_latency'] is not None else None)
+        self.slices = max(kw['slices'], 1)
+        self.interval = kw['interval']
 
         try:
             func = getattr(self, 'do_%s' % command)
@@ -42,25 +96,92 @@ class Command(BaseCommand):
 
         from springy.indices import registry
 
+        self.all_indices = not indices
+
         if indices:
-            index_classes = map(lambda x: registry.get(x), indices)
+            index_classes = list(map(lambda x: registry.get(x), indices))
         else:
             index_classes = registry.get_all()
 
+        self.failed = []
         func(index_classes, no_confirm=no_confirm)
 
-    def _call_indices(self, indices, method_name, **kwargs):
-        for index_cls in indices:
-            index = index_cls()
-            try:
-                getattr(index, method_name)(**kwargs)
-            except Exception as ex:
-                print('%s: %s' % ( index.name, ex))
+        if self.failed:
+            raise CommandError('Failed indices: %s' % ', '.join(self.failed))
+
+    def _estimate_size(self, index, method_name):
+        if method_name != 'update_index':
+            return 0
+        try:
+            return index.get_query_set().count()
+        except Exception:
+            return 0
+
+    def _call_index(self, args):
+        from django.db import connections
+
+        index, method_name, kwargs = args
+        start = time.time()
+        try:
+            result = getattr(index, method_name)(**kwargs)
+        except Exception as ex:
+            return index, None, ex, time.time() - start
+        else:
+            return index, result, None, time.time() - start
+        finally:
+            connections.close_all()
+
+    def _call_indices(self, indices, method_name, index_kwargs=None,
+                      **kwargs):
+        """
+        Call `method_name` on every index using `self.jobs` threads.
+        `index_kwargs` callable may return additional arguments for
+        each index. Biggest indices are started first. Returns list of
+        `(index, result, exception, elapsed)` tuples.
+        """
+
+        indices = [index_cls() for index_cls in indices]
+        if not indices:
+            return []
+
+        sizes = dict(
+                (index.name, self._estimate_size(index, method_name))
+                for index in indices)
+        indices.sort(key=lambda x: sizes[x.name], reverse=True)
+
+        def get_kwargs(index):
+            if index_kwargs is None:
+                return kwargs
+            return dict(kwargs, **index_kwargs(index))
+
+        pool = ThreadPool(min(self.jobs, len(indices)))
+        try:
+            results = pool.map(
+                    self._call_index,
+                    [(index, method_name, get_kwargs(index))
+                     for index in indices],
+                    chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+        self._report(results)
+        return results
+
+    def _report(self, results):
+        for index, result, error, elapsed in results:
+            if error is None:
+                status = 'ok'
+            else:
+                self.failed.append(index.name)
+                status = 'failed: %s' % error
+            print('%s: %.2fs %s' % (index.name, elapsed, status))
 
     def do_update(self, indices, no_confirm=False):
         self._call_indices(
                 indices, 'update_index', request_timeout=self.timeout,
-                chunk_size=self.chunk_size)
+                chunk_size=self.chunk_size, resume=self.resume,
+                max_rate=self.max_rate, max_latency=self.max_latency)
 
     def do_clear(self, indices, no_confirm=False):
         indices_list = u'\n'.join(map(lambda x: u'\t- %s' % x, indices))
@@ -77,4 +198,62 @@ class Command(BaseCommand):
             self._call_indices(indices, 'drop_index')
 
     def do_initialize(self, indices, no_confirm=False):
-        self._call_indices(indices, 'initialize')
+        results = self._call_indices(
+                indices, 'initialize', dry_run=self.plan)
+        if self.plan:
+            for index, plan, error, elapsed in results:
+                if error is not None:
+                    continue
+                print('%s:' % index.name)
+                for step in plan.describe():
+                    print('\t- %s' % step)
+
+    def do_reindex(self, indices, no_confirm=False):
+        def index_kwargs(index):
+            def progress(status):
+                if status.get('total'):
+                    print('%s: %d/%d' % (
+                        index.name,
+                        status.get('created', 0) + status.get('updated', 0),
+                        status['total']))
+            return {'progress': progress}
+
+        results = self._call_indices(
+                indices, 'reindex', index_kwargs=index_kwargs,
+                slices=self.slices, request_timeout=self.timeout)
+        for index, new_index, error, elapsed in results:
+            if error is None:
+                print('%s: alias points to `%s`' % (index.name, new_index))
+
+    def do_warm(self, indices, no_confirm=False):
+        self._call_indices(
+                indices, 'warm', max_num_segments=self.max_segments,
+                request_timeout=self.timeout)
+
+    def do_export(self, indices, no_confirm=False):
+        self._call_indices(
+                indices, 'export_index', path=self.path, slices=self.slices,
+                chunk_size=self.chunk_size)
+
+    def do_import(self, indices, no_confirm=False):
+        self._call_indices(
+                indices, 'import_index', path=self.path, jobs=self.jobs,
+                chunk_size=self.chunk_size, request_timeout=self.timeout)
+
+    def do_consume(self, indices, no_confirm=False):
+        from springy.outbox import consume
+
+        names = None if self.all_indices else [x().name for x in indices]
+        total = 0
+        while True:
+            count = consume(
+                    batch_size=self.chunk_size, indices=names,
+                    request_timeout=self.timeout)
+            total += count
+            if count:
+                print('consumed %d outbox entries' % count)
+            elif not self.follow:
+                break
+            else:
+                time.sleep(self.interval)
+        print('total: %d' % total)
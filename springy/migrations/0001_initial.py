@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEntry',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID')),
+                ('index', models.CharField(max_length=255)),
+                ('object_id', models.CharField(max_length=255)),
+                ('action', models.CharField(
+                    choices=[('index', 'index'), ('delete', 'delete')],
+                    max_length=10)),
+                ('document_index', models.CharField(
+                    blank=True, default='', max_length=255)),
+                ('routing', models.CharField(
+                    blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('pk',),
+                'verbose_name': 'outbox entry',
+                'verbose_name_plural': 'outbox entries',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+import six
+from django.db import models
+
+
+@six.python_2_unicode_compatible
+class OutboxEntry(models.Model):
+    """
+    Index update intent recorded in the same transaction as model change
+    """
+
+    ACTION_INDEX = 'index'
+    ACTION_DELETE = 'delete'
+    ACTIONS = (
+        (ACTION_INDEX, 'index'),
+        (ACTION_DELETE, 'delete'),
+        )
+
+    index = models.CharField(max_length=255)
+    object_id = models.CharField(max_length=255)
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    document_index = models.CharField(max_length=255, blank=True, default='')
+    routing = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('pk',)
+        verbose_name = 'outbox entry'
+        verbose_name_plural = 'outbox entries'
+
+    def __str__(self):
+        return '%s %s:%s' % (self.action, self.index, self.object_id)
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+
+import six
+from django.db import connections, router, transaction
+from django.db.models.signals import post_save, post_delete
+
+from .indices import registry
+
+
+def _document_meta(index, instance):
+    meta = index.get_action_meta(instance)
+    routing = meta.get('_routing')
+    return {
+        'document_index': meta.get('_index') or '',
+        'routing': six.text_type(routing) if routing is not None else None,
+        }
+
+
+def record(instance, action, model=None, filter_changes=False,
+           update_fields=None, using=None):
+    """
+    Record index update intent of `instance` for every index registered
+    for its model. Entries are saved in the current transaction of `using`
+    database (the database the instance was saved to).
+
+    With `filter_changes` indices not affected by the changed fields
+    (see `Index.is_affected()`) are skipped.
+    """
+
+    from .models import OutboxEntry
+
+    entries = []
+    for index_cls in registry.get_for_model(model or type(instance)):
+        index = index_cls()
+        if filter_changes and not index.is_affected(instance, update_fields):
+            continue
+        entries.append(OutboxEntry(
+            index=index.name, object_id=six.text_type(instance.pk),
+            action=action, **_document_meta(index, instance)))
+    if entries:
+        OutboxEntry.objects.using(using).bulk_create(entries)
+    return entries
+
+
+def record_save(sender, instance, created=False, update_fields=None,
+                raw=False, using=None, **kwargs):
+    from .models import OutboxEntry
+    if not raw:
+        record(
+                instance, OutboxEntry.ACTION_INDEX, model=sender,
+                filter_changes=not created, update_fields=update_fields,
+                using=using)
+
+
+def record_delete(sender, instance, using=None, **kwargs):
+    from .models import OutboxEntry
+    record(instance, OutboxEntry.ACTION_DELETE, model=sender, using=using)
+
+
+def connect_signals():
+    from .signals import connect_tracking_signals
+    post_save.connect(record_save, dispatch_uid='springy_outbox_save')
+    post_delete.connect(record_delete, dispatch_uid='springy_outbox_delete')
+    connect_tracking_signals()
+
+
+def disconnect_signals():
+    from .signals import disconnect_tracking_signals
+    post_save.disconnect(dispatch_uid='springy_outbox_save')
+    post_delete.disconnect(dispatch_uid='springy_outbox_delete')
+    disconnect_tracking_signals()
+
+
+def collapse_entries(entries):
+    """
+    Group entries by index. Only the latest intent for each object is kept.
+    Returns dict of index name mapped to dict of object ids and entries.
+    """
+
+    grouped = OrderedDict()
+    for entry in entries:
+        grouped.setdefault(entry.index, OrderedDict())[
+                entry.object_id] = entry
+    return grouped
+
+
+def delete_action(entry):
+    action = {'_id': entry.object_id}
+    if entry.document_index:
+        action['_index'] = entry.document_index
+    if entry.routing is not None:
+        action['_routing'] = entry.routing
+    return action
+
+
+def process_entries(index, entries, **kwargs):
+    """
+    Apply collapsed outbox entries (dict of object id mapped to entry)
+    to `index` using bulk requests.
+    """
+
+    from .models import OutboxEntry
+
+    to_update = [
+            x for x in entries
+            if entries[x].action == OutboxEntry.ACTION_INDEX]
+    to_delete = [
+            entries[x] for x in entries
+            if entries[x].action == OutboxEntry.ACTION_DELETE]
+
+    if to_update:
+        queryset = index.get_query_set().filter(pk__in=to_update)
+        found = set(
+                six.text_type(x)
+                for x in queryset.values_list('pk', flat=True))
+        if found:
+            if index._meta.use_values:
+                queryset = index.get_values_query_set(queryset)
+            index.save_many(queryset, **kwargs)
+        to_delete.extend(entries[x] for x in to_update if x not in found)
+
+    if to_delete:
+        index.delete_actions(
+                map(delete_action, to_delete), fail_silently=True, **kwargs)
+
+
+def consume(batch_size=1000, indices=None, database=None, **kwargs):
+    """
+    Process one batch of outbox entries of `database` and return its size.
+
+    Entries are locked with `SELECT ... FOR UPDATE` (skipping rows locked
+    by other consumers when supported) and removed only after all bulk
+    requests succeeded, so entries are not lost when the cluster is down.
+    Entries of indices not registered in the current process are kept.
+    """
+
+    from .models import OutboxEntry
+
+    db = database or router.db_for_write(OutboxEntry)
+
+    registered = [x._meta.index for x in registry.get_all()]
+    if indices is not None:
+        registered = [x for x in registered if x in indices]
+
+    with transaction.atomic(using=db):
+        queryset = OutboxEntry.objects.using(db).filter(
+                index__in=registered).order_by('pk')
+        if getattr(connections[db].features,
+                   'has_select_for_update_skip_locked', False):
+            queryset = queryset.select_for_update(skip_locked=True)
+        else:
+            queryset = queryset.select_for_update()
+
+        entries = list(queryset[:batch_size])
+        if not entries:
+            return 0
+
+        for index_name, index_entries in collapse_entries(entries).items():
+            index = registry.get(index_name)()
+            process_entries(index, index_entries, **kwargs)
+
+        OutboxEntry.objects.using(db).filter(
+                pk__in=[x.pk for x in entries]).delete()
+
+    return len(entries)
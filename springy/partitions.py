@@ -0,0 +1,72 @@
+import datetime
+import re
+
+
+PERIODS = {
+    'year': '%Y',
+    'month': '%Y.%m',
+    'day': '%Y.%m.%d',
+    }
+
+SUFFIX_PATTERNS = {
+    'year': r'\d{4}',
+    'month': r'\d{4}\.\d{2}',
+    'day': r'\d{4}\.\d{2}\.\d{2}',
+    }
+
+
+def _validate_period(period):
+    if period not in PERIODS:
+        raise ValueError(
+                'Unknown partition period `%s`, use one of: %s' % (
+                    period, ', '.join(sorted(PERIODS))))
+
+
+def partition_suffix(value, period):
+    """
+    Return partition name suffix for date/datetime `value`
+    """
+
+    _validate_period(period)
+    if value is None:
+        raise ValueError('Partition date can not be empty')
+    return value.strftime(PERIODS[period])
+
+
+def partition_name_re(index_name, period):
+    """
+    Return compiled regex matching names of `index_name` partitions
+    """
+
+    _validate_period(period)
+    return re.compile(r'^%s-%s$' % (
+        re.escape(index_name), SUFFIX_PATTERNS[period]))
+
+
+def _next_period(value, period):
+    if period == 'day':
+        return value + datetime.timedelta(days=1)
+    if period == 'month':
+        if value.month == 12:
+            return value.replace(year=value.year+1, month=1, day=1)
+        return value.replace(month=value.month+1, day=1)
+    return value.replace(year=value.year+1, month=1, day=1)
+
+
+def partition_suffixes(start, end, period):
+    """
+    Return suffixes of all partitions touched by <start, end> date range
+    """
+
+    _validate_period(period)
+    if isinstance(start, datetime.datetime):
+        start = start.date()
+    if isinstance(end, datetime.datetime):
+        end = end.date()
+
+    suffixes = []
+    current = start
+    while current <= end:
+        suffixes.append(partition_suffix(current, period))
+        current = _next_period(current, period)
+    return suffixes
@@ -0,0 +1,208 @@
+import six
+
+
+STATIC_SETTINGS = ('codec', 'routing_partition_size')
+NOT_UPDATEABLE_SETTINGS = ('number_of_shards',)
+
+# Settings reported by Elasticsearch which are not a part of index
+# definition and must not be compared with declared settings.
+READONLY_SETTINGS = (
+        'creation_date', 'uuid', 'version', 'provided_name')
+
+# Declared field types which are stored by Elasticsearch under another name
+FIELD_TYPE_ALIASES = {
+    'string': ('text', 'keyword', 'string'),
+    }
+
+
+def flatten_settings(settings, prefix=''):
+    """
+    Convert nested settings dict into flat dict of dotted keys with
+    string values, as Elasticsearch reports them.
+    """
+
+    flat = {}
+    for key, value in (settings or {}).items():
+        key = '%s%s' % (prefix, key)
+        if isinstance(value, dict):
+            flat.update(flatten_settings(value, prefix=key+'.'))
+        elif isinstance(value, (list, tuple)):
+            flat[key] = [six.text_type(x) for x in value]
+        elif isinstance(value, bool):
+            flat[key] = six.text_type(value).lower()
+        else:
+            flat[key] = six.text_type(value)
+    return flat
+
+
+def normalize_settings(settings):
+    """
+    Return flat settings without `index.` prefix and read-only keys
+    """
+
+    flat = {}
+    for key, value in flatten_settings(settings).items():
+        if key.startswith('index.'):
+            key = key[len('index.'):]
+        if key in READONLY_SETTINGS:
+            continue
+        flat[key] = value
+    return flat
+
+
+def diff_settings(live, declared):
+    """
+    Return dict of declared settings which differ from the live ones
+    """
+
+    live = normalize_settings(live)
+    declared = normalize_settings(declared)
+    return dict(
+            (key, value) for key, value in declared.items()
+            if live.get(key) != value)
+
+
+def diff_mapping(live, declared, prefix=''):
+    """
+    Compare properties of live and declared mappings, including
+    multi-fields (`fields`) and properties of object and nested fields.
+
+    Return tuple of new properties (dict of dotted names) and dotted names
+    of properties which type was changed (list).
+    """
+
+    live = (live or {}).get('properties') or {}
+    declared = (declared or {}).get('properties') or {}
+
+    new, changed = {}, []
+    for name, definition in declared.items():
+        path = '%s%s' % (prefix, name)
+        if name not in live:
+            new[path] = definition
+            continue
+        declared_type = definition.get('type', 'object')
+        live_type = live[name].get('type', 'object')
+        if live_type not in FIELD_TYPE_ALIASES.get(
+                declared_type, (declared_type,)):
+            changed.append(path)
+            continue
+
+        for key in ('properties', 'fields'):
+            sub_new, sub_changed = diff_mapping(
+                    {'properties': live[name].get(key)},
+                    {'properties': definition.get(key)},
+                    prefix=path+'.')
+            new.update(sub_new)
+            changed.extend(sub_changed)
+    return new, sorted(changed)
+
+
+def unflatten_settings(flat):
+    """
+    Convert flat dotted settings into nested dict
+    """
+
+    nested = {}
+    for key, value in flat.items():
+        parts = key.split('.')
+        node = nested
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return nested
+
+
+class InitializePlan(object):
+    """
+    Describes changes required to bring index to its declared state
+    """
+
+    def __init__(
+            self, index, create=False, template=None, dynamic_settings=None,
+            static_settings=None, analysis=None, skipped_settings=None,
+            new_fields=None, changed_fields=None):
+        self.index = index
+        self.create = create
+        self.template = template
+        self.dynamic_settings = dynamic_settings or {}
+        self.static_settings = static_settings or {}
+        self.analysis = analysis or {}
+        self.skipped_settings = skipped_settings or {}
+        self.new_fields = new_fields or {}
+        self.changed_fields = changed_fields or []
+
+    @property
+    def requires_close(self):
+        return bool(self.analysis or self.static_settings)
+
+    @property
+    def update_mapping(self):
+        return bool(self.create or self.new_fields or self.changed_fields)
+
+    def is_empty(self):
+        return not (
+                self.create or self.template or self.dynamic_settings
+                or self.requires_close or self.update_mapping)
+
+    def describe(self):
+        """
+        Return list of human readable steps
+        """
+
+        if self.create:
+            return ['create index `%s`' % self.index]
+        if self.template:
+            return ['put index template `%s` for `%s`' % (
+                self.index, self.template)]
+
+        steps = []
+        for key in sorted(self.dynamic_settings):
+            steps.append('update setting `%s` to %r (online)' % (
+                key, self.dynamic_settings[key]))
+        if self.requires_close:
+            steps.append('close index `%s`' % self.index)
+            for key in sorted(self.analysis):
+                steps.append('update analysis `%s`' % key)
+            for key in sorted(self.static_settings):
+                steps.append('update setting `%s` to %r' % (
+                    key, self.static_settings[key]))
+            steps.append('open index `%s`' % self.index)
+        for name in sorted(self.new_fields):
+            steps.append('add field `%s` (online)' % name)
+        for name in self.changed_fields:
+            steps.append(
+                    'field `%s` type was changed, '
+                    'mapping update will fail (reindex required)' % name)
+        for key in sorted(self.skipped_settings):
+            steps.append(
+                    'setting `%s` can not be changed (reindex required)'
+                    % key)
+        return steps or ['nothing to do']
+
+
+def build_initialize_plan(
+        index_name, live_settings, declared_settings,
+        live_mapping=None, declared_mapping=None):
+    """
+    Compute InitializePlan from live and declared settings and mappings
+    """
+
+    changed = diff_settings(live_settings, declared_settings)
+
+    analysis, static, dynamic, skipped = {}, {}, {}, {}
+    for key, value in changed.items():
+        if key.startswith('analysis.'):
+            analysis[key[len('analysis.'):]] = value
+        elif key in NOT_UPDATEABLE_SETTINGS:
+            skipped[key] = value
+        elif key in STATIC_SETTINGS:
+            static[key] = value
+        else:
+            dynamic[key] = value
+
+    new_fields, changed_fields = diff_mapping(live_mapping, declared_mapping)
+
+    return InitializePlan(
+            index_name, dynamic_settings=dynamic, static_settings=static,
+            analysis=analysis, skipped_settings=skipped,
+            new_fields=new_fields, changed_fields=changed_fields)
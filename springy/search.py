@@ -1,7 +1,77 @@
+import json
+import logging
+import time
+from array import array
+from collections import OrderedDict
+
+import six
+
 from elasticsearch_dsl import (
         Search as BaseSearch,
         MultiSearch as BaseMultiSearch,
         )
+from elasticsearch_dsl.connections import connections
+
+from .compact import CompactResult
+
+
+HIT_META_FIELDS = ('_id', '_score', '_index', '_type')
+
+slow_log = logging.getLogger('springy.slow_query')
+
+
+def _profile_time(node):
+    if 'time_in_nanos' in node:
+        return node['time_in_nanos'] / 1e6
+    value = six.text_type(node.get('time', '0'))
+    for suffix, factor in (('micros', 1e-3), ('ms', 1.0), ('s', 1e3)):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * factor
+    return float(value or 0)
+
+
+def condense_profile(profile):
+    """
+    Convert response of profile API into list of query clauses
+    (dicts of `type`, `description`, `depth`, `time_ms` summed over
+    shards and `shards` count) sorted by time.
+    """
+
+    clauses = OrderedDict()
+
+    def visit(node, depth):
+        key = (node.get('type'), node.get('description'), depth)
+        clause = clauses.setdefault(key, {
+            'type': key[0], 'description': key[1], 'depth': depth,
+            'time_ms': 0.0, 'shards': 0})
+        clause['time_ms'] += _profile_time(node)
+        clause['shards'] += 1
+        for child in node.get('children') or []:
+            visit(child, depth + 1)
+
+    for shard in (profile or {}).get('shards') or []:
+        for search in shard.get('searches') or []:
+            for node in search.get('query') or []:
+                visit(node, 0)
+
+    return sorted(
+            clauses.values(), key=lambda x: (-x['time_ms'], x['depth']))
+
+
+def get_hit_value(hit, field):
+    """
+    Get `field` value (meta field or dotted source path) from raw hit
+    """
+
+    if field in HIT_META_FIELDS:
+        return hit.get(field)
+    value = hit.get('_source') or {}
+    for part in field.split('.'):
+        try:
+            value = value[part]
+        except (KeyError, TypeError):
+            return None
+    return value
 
 
 class IterableSearch(BaseSearch):
@@ -10,19 +80,202 @@ class IterableSearch(BaseSearch):
     (also fixes https://github.com/elastic/elasticsearch-dsl-py/issues/279)
     """
 
+    _values = None
+    _compact = None
+
     def __iter__(self):
+        if self._values is not None:
+            return self._iter_values()
+        if self._compact is not None:
+            return iter(self.execute_compact())
         return iter(self.execute())
 
     def __len__(self):
+        # total of the (cached) page response is used instead of a count
+        # request, because `list()` calls `len()` before iterating
+        if self._values is not None:
+            return self.execute_raw()['hits']['total']
+        if self._compact is not None:
+            return self.execute_compact().total
         return self.count()
 
+    def page_length(self):
+        """
+        Return number of hits of the current page (`len()` returns
+        number of all matching documents in every mode)
+        """
+        if self._values is not None:
+            return len(self.execute_raw()['hits']['hits'])
+        if self._compact is not None:
+            return len(self.execute_compact())
+        return len(self.execute().hits)
+
+    def _clone(self):
+        s = super(IterableSearch, self)._clone()
+        s._values = self._values
+        s._compact = self._compact
+        return s
+
+    def compact(self, *fields):
+        """
+        Return search which keeps results in `CompactResult` columns
+        (ids, scores, sort values and requested source `fields`) instead
+        of caching the whole response. Hits are materialized lazily.
+        """
+        s = self.source(list(fields) or False)
+        s._compact = fields
+        return s
+
+    def execute_compact(self):
+        """
+        Execute search and return `CompactResult`
+        """
+        try:
+            return self._cached_compact_result
+        except AttributeError:
+            self._cached_compact_result = CompactResult(
+                    self._search_raw(self.to_dict()), self._compact or ())
+            return self._cached_compact_result
+
     def execute(self):
         try:
             return self._cached_result
         except AttributeError:
+            start = time.time()
             self._cached_result = super(IterableSearch, self).execute()
+            self._log_slow(
+                    self._cached_result.took, time.time() - start)
             return self._cached_result
 
+    def execute_raw(self):
+        """
+        Execute search and return raw response dict
+        without building Response/Hit wrappers
+        """
+        try:
+            return self._cached_raw_result
+        except AttributeError:
+            self._cached_raw_result = self._search_raw(self.to_dict())
+            return self._cached_raw_result
+
+    def _search_raw(self, body):
+        es = connections.get_connection(self._using)
+        start = time.time()
+        response = es.search(
+                index=self._index, doc_type=self._doc_type,
+                body=body, **self._params)
+        self._log_slow(response.get('took'), time.time() - start, body=body)
+        return response
+
+    def _log_slow(self, took, elapsed, body=None):
+        """
+        Log search which took longer than `SPRINGY_SLOW_QUERY_THRESHOLD`
+        milliseconds (client-side)
+        """
+
+        from .settings import SLOW_QUERY_THRESHOLD
+
+        elapsed_ms = elapsed * 1000
+        if SLOW_QUERY_THRESHOLD is None or elapsed_ms < SLOW_QUERY_THRESHOLD:
+            return
+
+        body = self.to_dict() if body is None else body
+        slow_log.warning(
+                'Slow query on %s: took %sms, latency %.1fms: %s',
+                ','.join(self._index or ['_all']), took, elapsed_ms,
+                json.dumps(body, sort_keys=True, default=six.text_type),
+                extra={
+                    'indices': self._index, 'body': body, 'took': took,
+                    'latency': elapsed_ms})
+
+    def profile(self):
+        """
+        Run search with profile API and return per-clause timings
+        (see `condense_profile()`)
+        """
+        body = self.to_dict()
+        body['profile'] = True
+        return condense_profile(self._search_raw(body).get('profile'))
+
+    def _iter_values(self):
+        fields, flat, as_dict = self._values
+        for hit in self.execute_raw()['hits']['hits']:
+            if as_dict:
+                yield dict((x, get_hit_value(hit, x)) for x in fields)
+            elif flat:
+                yield get_hit_value(hit, fields[0])
+            else:
+                yield tuple(get_hit_value(hit, x) for x in fields)
+
+    def _values_search(self, fields, flat=False, as_dict=False):
+        source_fields = [x for x in fields if x not in HIT_META_FIELDS]
+        s = self.source(source_fields or False)
+        s._values = (fields, flat, as_dict)
+        return s
+
+    def values(self, *fields):
+        """
+        Return search which yields plain dicts of requested `fields`.
+        Only requested fields are fetched from `_source`.
+        Meta fields (`_id`, `_score`, `_index`, `_type`) are supported.
+        """
+        return self._values_search(fields, as_dict=True)
+
+    def values_list(self, *fields, **kwargs):
+        """
+        Return search which yields tuples of requested `fields`,
+        or single values when `flat=True`.
+        """
+        flat = kwargs.pop('flat', False)
+        if kwargs:
+            raise TypeError(
+                    'Unexpected keyword arguments to values_list: %s' % (
+                        list(kwargs),))
+        if flat and len(fields) > 1:
+            raise TypeError(
+                    '`flat` is not valid when values_list is called '
+                    'with more than one field.')
+        return self._values_search(fields, flat=flat)
+
+    def ids(self):
+        """
+        Return list of ids of matched documents
+        """
+        return list(self._values_search(('_id',), flat=True))
+
+    def scores(self):
+        """
+        Return array of scores of matched documents
+        """
+        return array('d', (
+            x or 0.0 for x in self._values_search(('_score',), flat=True)))
+
+    def objects(self):
+        """
+        Return model instances of matched documents in hits order.
+
+        Hits are resolved to registered indices by their `_index`, so
+        results of cross-index searches are mapped to their models.
+        Instances are fetched with one query per index and objects which
+        no longer exist in the database are skipped.
+        """
+
+        from .indices import registry
+
+        keys, pks_by_index = [], OrderedDict()
+        for index_name, pk in self._values_search(('_index', '_id')):
+            index_cls = registry.get_for_index_name(index_name)
+            pks_by_index.setdefault(index_cls, []).append(pk)
+            keys.append((index_cls, pk))
+
+        instances = {}
+        for index_cls, pks in pks_by_index.items():
+            queryset = index_cls().get_query_set().filter(pk__in=pks)
+            for obj in queryset:
+                instances[(index_cls, six.text_type(obj.pk))] = obj
+
+        return [instances[key] for key in keys if key in instances]
+
     def parse(self, query):
         return self.query('query_string', query=query, use_dis_max=True)
 
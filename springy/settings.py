@@ -6,3 +6,11 @@ AUTODISCOVER_MODULE = getattr(
         settings, 'SPRINGY_AUTODISCOVER_MODULE', 'search')
 
 AUTODISCOVER = getattr(settings, 'SPRINGY_AUTODISCOVER', True)
+AUTO_UPDATE = getattr(settings, 'SPRINGY_AUTO_UPDATE', False)
+OUTBOX = getattr(settings, 'SPRINGY_OUTBOX', False)
+
+# milliseconds, `None` disables slow query log
+SLOW_QUERY_THRESHOLD = getattr(settings, 'SPRINGY_SLOW_QUERY_THRESHOLD', None)
+
+# persistent directory of `update_index` checkpoints, required by `resume`
+CHECKPOINT_DIR = getattr(settings, 'SPRINGY_CHECKPOINT_DIR', None)
@@ -0,0 +1,127 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from elasticsearch.helpers import BulkIndexError
+
+from .changes import get_update_field_names, store_initial_values
+from .indices import registry
+
+
+def get_tracked_field_names(model):
+    """
+    Return names of fields to track for indices of `model` having
+    `Meta.track_changes` set
+    """
+
+    names = set()
+    for index_cls in registry.get_for_model(model):
+        if not index_cls._meta.track_changes:
+            continue
+        dependencies = index_cls().get_dependency_fields()
+        if dependencies:
+            names.update(dependencies)
+    return names
+
+
+def track_initial_values(sender, instance, **kwargs):
+    names = get_tracked_field_names(sender)
+    if names:
+        store_initial_values(instance, names)
+
+
+def reset_initial_values(sender, instance, raw=False, **kwargs):
+    track_initial_values(sender, instance)
+
+
+def connect_tracking_signals():
+    post_init.connect(
+            track_initial_values, dispatch_uid='springy_track_changes')
+    # reconnect to be called after all handlers comparing initial values
+    post_save.disconnect(dispatch_uid='springy_reset_changes')
+    post_save.connect(
+            reset_initial_values, dispatch_uid='springy_reset_changes')
+
+
+def disconnect_tracking_signals():
+    post_init.disconnect(dispatch_uid='springy_track_changes')
+    post_save.disconnect(dispatch_uid='springy_reset_changes')
+
+
+def is_document_missing(error):
+    """
+    Check if all items of BulkIndexError `error` failed because
+    the updated document does not exist
+    """
+
+    items = [list(x.values())[0] for x in error.errors or []]
+    return bool(items) and all(
+            x.get('status') == 404 and isinstance(x.get('error'), dict)
+            and x['error'].get('type') == 'document_missing_exception'
+            for x in items)
+
+
+def update_document(sender, instance, created=False, update_fields=None,
+                    raw=False, **kwargs):
+    """
+    Update documents of all indices registered for the saved model.
+
+    Saves which do not change fields the document depends on are skipped.
+    When the model was saved with `update_fields`, only the intersecting
+    index fields (and prepared fields) are sent as a partial update.
+    Documents of objects no longer matching the indexing queryset
+    are deleted.
+    """
+
+    if raw:
+        return
+
+    for index_cls in registry.get_for_model(sender):
+        index = index_cls()
+
+        if not created and not index.is_affected(instance, update_fields):
+            continue
+
+        if created or not update_fields:
+            if not index.update(instance) and not created:
+                index.delete(instance, fail_silently=True)
+            continue
+
+        names = get_update_field_names(sender, update_fields)
+        prepared = index.get_prepared_field_names()
+        fields = [
+                x for x in index._schema.get_field_names()
+                if x in names or x in prepared]
+
+        if not index.get_query_set().filter(pk=instance.pk).exists():
+            index.delete(instance, fail_silently=True)
+            continue
+
+        if not fields:
+            # only fields of queryset filters were changed, so the object
+            # may have just entered the indexing queryset
+            if not index.has_document(instance):
+                index.save(instance)
+            continue
+
+        try:
+            index.update_fields([instance], fields)
+        except BulkIndexError as ex:
+            if not is_document_missing(ex):
+                raise
+            # document was not indexed yet
+            index.save(instance)
+
+
+def delete_document(sender, instance, **kwargs):
+    for index_cls in registry.get_for_model(sender):
+        index_cls().delete(instance, fail_silently=True)
+
+
+def connect_signals():
+    post_save.connect(update_document, dispatch_uid='springy_update_document')
+    post_delete.connect(
+            delete_document, dispatch_uid='springy_delete_document')
+    connect_tracking_signals()
+
+
+def disconnect_signals():
+    post_save.disconnect(dispatch_uid='springy_update_document')
+    post_delete.disconnect(dispatch_uid='springy_delete_document')
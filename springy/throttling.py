@@ -0,0 +1,169 @@
+import re
+import threading
+import time
+
+import six
+
+
+RATE_UNITS = {
+    '': 1,
+    'b': 1,
+    'kb': 1024,
+    'mb': 1024 * 1024,
+    'gb': 1024 * 1024 * 1024,
+    }
+
+
+def parse_rate(value):
+    """
+    Parse rate limit: plain number is documents/sec, a number followed by
+    `b`, `kb`, `mb` or `gb` is bytes/sec. Returns tuple of rate and unit.
+    """
+
+    match = re.match(
+            r'^\s*(\d+(?:\.\d+)?)\s*([kmg]?b)?\s*$',
+            six.text_type(value).lower())
+    if not match:
+        raise ValueError('Invalid rate `%s`' % value)
+    rate, unit = float(match.group(1)), match.group(2) or ''
+    if rate <= 0:
+        raise ValueError('Rate must be greater than zero')
+    if unit:
+        return rate * RATE_UNITS[unit], 'bytes'
+    return rate, 'docs'
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket. Tokens are refilled at `rate` per second
+    up to `capacity` (one second of tokens by default).
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.time,
+                 sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            self.capacity = float(rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def consume(self, tokens=1):
+        """
+        Take `tokens` from the bucket, sleeping until they are available.
+        Requests bigger than capacity are allowed and paid off by waiting.
+        Returns time spent sleeping.
+        """
+
+        with self._lock:
+            self._refill()
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class Throttle(object):
+    """
+    Limits indexing throughput to `max_rate` documents (or bytes) per
+    second. The rate is halved when bulk requests are rejected or search
+    latency exceeds `max_latency` (seconds) and restored gradually when
+    the cluster recovers.
+    """
+
+    def __init__(self, max_rate, unit='docs', max_latency=None,
+                 min_rate=None, max_retries=5, retry_delay=1.0,
+                 clock=time.time, sleep=time.sleep):
+        if unit not in ('docs', 'bytes'):
+            raise ValueError('Unknown rate unit `%s`' % unit)
+        self.max_rate = float(max_rate)
+        self.min_rate = float(min_rate or self.max_rate / 20)
+        self.unit = unit
+        self.max_latency = max_latency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.sleep = sleep
+        self.bucket = TokenBucket(max_rate, clock=clock, sleep=sleep)
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def slow_down(self):
+        self.bucket.set_rate(max(self.rate / 2, self.min_rate))
+
+    def speed_up(self):
+        self.bucket.set_rate(
+                min(self.rate + self.max_rate / 10, self.max_rate))
+
+    def observe(self, latency=None, rejected=False):
+        """
+        Adjust rate after a request, using measured search `latency`
+        and bulk rejection flag
+        """
+
+        overloaded = rejected or (
+                self.max_latency is not None and latency is not None
+                and latency > self.max_latency)
+        if overloaded:
+            self.slow_down()
+        elif self.rate < self.max_rate:
+            self.speed_up()
+
+    def backoff(self, attempt):
+        """
+        Slow down after rejection and wait before retry `attempt`
+        """
+        self.observe(rejected=True)
+        self.sleep(self.retry_delay * 2 ** attempt)
+
+    def throttled(self, actions, serializer=None):
+        """
+        Iterate over bulk `actions` not faster than the current rate
+        """
+
+        for action in actions:
+            if self.unit == 'bytes':
+                self.bucket.consume(len(serializer.dumps(action)))
+            else:
+                self.bucket.consume(1)
+            yield action
+
+
+def is_rejection(error):
+    """
+    Check if `error` (TransportError or BulkIndexError) was caused by
+    rejected execution (queue of the cluster is full)
+    """
+
+    from elasticsearch.helpers import BulkIndexError
+
+    if isinstance(error, BulkIndexError):
+        items = error.errors or []
+        return bool(items) and all(
+                list(x.values())[0].get('status') == 429 for x in items)
+    return getattr(error, 'status_code', None) == 429
+
+
+def measure_search_latency(connection, index_name):
+    """
+    Return server-side time (seconds) of a cheap search on `index_name`
+    """
+    response = connection.search(
+            index=index_name, body={'size': 0}, request_timeout=30)
+    return response.get('took', 0) / 1000.0
@@ -1,7 +1,15 @@
+import six
 from django.db.models import FileField
 from django.db.models.options import Options
 from django.utils import module_loading
 
+try:
+    from django.core.exceptions import (
+            FieldDoesNotExist as DjangoFieldDoesNotExist)
+except ImportError:
+    from django.db.models import (
+            FieldDoesNotExist as DjangoFieldDoesNotExist)
+
 
 if hasattr(Options, 'get_fields'):
     def get_model_fields(obj):
@@ -44,12 +52,53 @@ def model_to_dict(obj, fields=None):
     return data
 
 
+class ValuesRow(dict):
+    """
+    Row of `QuerySet.values()` with attribute access to its columns
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def get_values_columns(model, field_names):
+    """
+    Return dict of field names mapped to `values()` columns
+    for concrete model fields (FK fields are mapped to `<name>_id`)
+    """
+
+    columns = {}
+    for field_name in field_names:
+        try:
+            field = get_model_field(model, field_name)
+        except DjangoFieldDoesNotExist:
+            continue
+        if getattr(field, 'many_to_many', False) or not getattr(
+                field, 'concrete', True):
+            continue
+        columns[field_name] = getattr(field, 'attname', field_name)
+    return columns
+
+
+def values_row_to_dict(row, columns):
+    data = {}
+    for field_name, column in columns.items():
+        value = row.get(column)
+        if value is None:
+            continue
+        data[field_name] = value
+    return data
+
+
 def index_to_string(x):
     try:
         return x._meta.index
     except AttributeError:
         pass
-    return unicode(x)  # NOQA
+    return six.text_type(x)
 
 
 def generate_index_name(cls):
@@ -73,3 +122,28 @@ def chunked(iterable, chunk_size):
             break
         x += chunk_size
         yield chunk
+
+
+def get_pk(obj):
+    """
+    Return primary key of model instance or `values()` row
+    """
+    return obj['pk'] if isinstance(obj, dict) else obj.pk
+
+
+def keyset_chunked(queryset, chunk_size, after=None):
+    """
+    Iterate over queryset ordered by primary key in chunks, using
+    `pk > last_pk` instead of offsets. Start after `after` pk when set.
+    """
+
+    queryset = queryset.order_by('pk')
+    while True:
+        qs = queryset
+        if after is not None:
+            qs = qs.filter(pk__gt=after)
+        chunk = list(qs[:chunk_size])
+        if not chunk:
+            break
+        after = get_pk(chunk[-1])
+        yield chunk
@@ -0,0 +1,45 @@
+import unittest
+
+from springy.cache import TTLCache
+
+
+class Clock(object):
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = TTLCache(maxsize=2, ttl=10, clock=self.clock)
+
+    def test_that_missing_key_returns_default(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('a', 1), 1)
+
+    def test_that_stored_value_is_returned(self):
+        self.cache.set('a', 1)
+        self.assertEqual(self.cache.get('a'), 1)
+
+    def test_that_value_expires_after_ttl(self):
+        self.cache.set('a', 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_that_least_recently_used_value_is_evicted(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+
+    def test_that_cache_can_be_cleared(self):
+        self.cache.set('a', 1)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('a'))
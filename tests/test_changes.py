@@ -0,0 +1,169 @@
+import unittest
+
+from elasticsearch_dsl import String
+from elasticsearch_dsl.connections import connections
+
+import springy
+from springy.backends.memory import MemoryElasticsearch
+from springy.changes import store_initial_values, get_changed_fields
+from springy.signals import update_document, track_initial_values
+
+from .test_indices import MyModel, WithRelatedFieldModel
+
+
+class DependencyFieldsTestCase(unittest.TestCase):
+    def tearDown(self):
+        springy.registry.unregister_all()
+
+    def test_that_mapped_model_fields_are_dependencies(self):
+        class SimpleIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'simple'
+
+        self.assertEqual(
+                SimpleIndex().get_dependency_fields(),
+                frozenset(['test_field']))
+
+    def test_that_declared_prepare_dependencies_are_used(self):
+        class RelatedIndex(springy.Index):
+            related_name = String()
+
+            class Meta:
+                fields = ('test_field', 'related_name')
+                model = WithRelatedFieldModel
+                index = 'related'
+
+            @springy.depends_on('related__test_related_field')
+            def prepare_related_name(self, obj):
+                return obj.related.test_related_field
+
+        self.assertEqual(
+                RelatedIndex().get_dependency_fields(),
+                frozenset(['test_field', 'related']))
+
+    def test_that_undeclared_prepare_dependencies_are_unknown(self):
+        class PreparedIndex(springy.Index):
+            special_field = String()
+
+            class Meta:
+                fields = ('test_field', 'special_field')
+                model = MyModel
+                index = 'prepared'
+
+            def prepare_special_field(self, obj):
+                return 'special'
+
+        self.assertIsNone(PreparedIndex().get_dependency_fields())
+
+    def test_that_custom_queryset_requires_declared_fields(self):
+        class FilteredIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'filtered'
+
+            def get_query_set(self):
+                return MyModel.objects.filter(id__gt=10)
+
+        class DeclaredFilteredIndex(FilteredIndex):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'declared_filtered'
+                queryset_fields = ('id',)
+
+        self.assertIsNone(FilteredIndex().get_dependency_fields())
+        self.assertEqual(
+                DeclaredFilteredIndex().get_dependency_fields(),
+                frozenset(['test_field', 'id']))
+
+    def test_that_attnames_are_normalized_to_field_names(self):
+        class RoutedIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = WithRelatedFieldModel
+                index = 'routed_by_related'
+                routing_field = 'related_id'
+
+        idx = RoutedIndex()
+        self.assertEqual(
+                idx.get_dependency_fields(),
+                frozenset(['test_field', 'related']))
+        obj = WithRelatedFieldModel(pk=1, test_field='a', related_id=1)
+        self.assertTrue(idx.is_affected(obj, update_fields=['related_id']))
+        self.assertTrue(idx.is_affected(obj, update_fields=['related']))
+
+    def test_that_custom_document_meta_makes_dependencies_unknown(self):
+        class RoutedIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'routed'
+
+            def get_routing(self, obj):
+                return obj.pk % 10
+
+        self.assertIsNone(RoutedIndex().get_dependency_fields())
+
+
+class ChangeTrackingTestCase(unittest.TestCase):
+    def setUp(self):
+        connections.add_connection('default', MemoryElasticsearch())
+
+        class SimpleIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'simple'
+                track_changes = True
+
+        self.idx = SimpleIndex()
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_changed_fields_are_detected(self):
+        obj = MyModel(pk=1, test_field='a')
+        store_initial_values(obj, ['test_field'])
+        self.assertEqual(get_changed_fields(obj), set())
+
+        obj.test_field = 'b'
+        self.assertEqual(get_changed_fields(obj), set(['test_field']))
+
+    def test_that_values_changed_in_place_are_detected(self):
+        obj = MyModel(pk=1, test_field=['a'])
+        store_initial_values(obj, ['test_field'])
+
+        obj.test_field.append('b')
+        self.assertEqual(get_changed_fields(obj), set(['test_field']))
+
+    def test_that_untracked_instance_has_unknown_changes(self):
+        obj = MyModel(pk=1, test_field='a')
+        obj.__dict__.pop('_springy_initial_values', None)
+        self.assertIsNone(get_changed_fields(obj))
+        self.assertTrue(self.idx.is_affected(obj))
+
+    def test_that_update_fields_outside_document_do_not_affect_it(self):
+        obj = MyModel(pk=1, test_field='a')
+        self.assertFalse(self.idx.is_affected(obj, update_fields=['id']))
+        self.assertTrue(
+                self.idx.is_affected(obj, update_fields=['test_field']))
+
+    def test_that_unchanged_instance_is_not_affected(self):
+        obj = MyModel(pk=1, test_field='a')
+        track_initial_values(MyModel, obj)
+        self.assertFalse(self.idx.is_affected(obj))
+
+        obj.test_field = 'b'
+        self.assertTrue(self.idx.is_affected(obj))
+
+    def test_that_unaffecting_save_is_skipped(self):
+        obj = MyModel(pk=1, test_field='a')
+        track_initial_values(MyModel, obj)
+
+        # would query the database if the document was updated
+        update_document(MyModel, obj, created=False)
+        update_document(MyModel, obj, created=False, update_fields=['id'])
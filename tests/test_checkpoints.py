@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+import unittest
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from elasticsearch_dsl.connections import connections
+
+import springy
+from springy import settings
+from springy.backends.memory import MemoryElasticsearch
+from springy.checkpoints import (
+        Checkpoint, FileCheckpointStore, get_checkpoint_store)
+
+from .test_indices import MyModel
+
+
+class FileCheckpointStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = FileCheckpointStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_that_missing_checkpoint_is_none(self):
+        self.assertIsNone(self.store.load('products'))
+
+    def test_that_saved_checkpoint_is_loaded(self):
+        checkpoint = Checkpoint('products', last_pk=42, count=100)
+        self.store.save(checkpoint)
+
+        loaded = self.store.load('products')
+        self.assertEqual(loaded.run_id, checkpoint.run_id)
+        self.assertEqual(loaded.last_pk, 42)
+        self.assertEqual(loaded.count, 100)
+
+    def test_that_namespaces_do_not_share_checkpoints(self):
+        self.store.save(Checkpoint('products', last_pk=1))
+        other = FileCheckpointStore(self.path, namespace='other.default')
+        self.assertIsNone(other.load('products'))
+
+    def test_that_deleted_checkpoint_is_not_loaded(self):
+        self.store.save(Checkpoint('products', last_pk=1))
+        self.store.delete('products')
+        self.assertIsNone(self.store.load('products'))
+
+
+class Interrupted(Exception):
+    pass
+
+
+class ResumeUpdateIndexTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            editor.create_model(MyModel)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            editor.delete_model(MyModel)
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.checkpoint_dir = settings.CHECKPOINT_DIR
+        settings.CHECKPOINT_DIR = self.path
+        connections.add_connection('default', MemoryElasticsearch())
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.pks = [
+                MyModel.objects.create(test_field='product %d' % x).pk
+                for x in range(5)]
+
+        self.saved = []
+        save_many = self.idx.save_many
+
+        def tracked_save_many(objects, **kwargs):
+            if self.interrupt_after is not None and len(
+                    self.saved) >= self.interrupt_after:
+                raise Interrupted
+            self.saved.extend(x.pk for x in objects)
+            return save_many(objects, **kwargs)
+        self.idx.save_many = tracked_save_many
+        self.interrupt_after = None
+
+    def tearDown(self):
+        settings.CHECKPOINT_DIR = self.checkpoint_dir
+        shutil.rmtree(self.path)
+        MyModel.objects.all().delete()
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_interrupted_run_is_resumed_after_last_checkpoint(self):
+        store = get_checkpoint_store()
+        self.interrupt_after = 2
+        with self.assertRaises(Interrupted):
+            self.idx.update_index(chunk_size=2, warm=False)
+
+        checkpoint = store.load('products')
+        self.assertEqual(checkpoint.last_pk, self.pks[1])
+        self.assertEqual(checkpoint.count, 2)
+
+        self.saved, self.interrupt_after = [], None
+        count = self.idx.update_index(chunk_size=2, resume=True, warm=False)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(self.saved, self.pks[2:])
+        self.assertEqual(len(self.idx.all()), 5)
+        self.assertIsNone(store.load('products'))
+
+    def test_that_run_without_resume_starts_from_beginning(self):
+        get_checkpoint_store().save(
+                Checkpoint('products', last_pk=self.pks[3], count=4))
+
+        self.assertEqual(self.idx.update_index(chunk_size=2, warm=False), 5)
+        self.assertEqual(self.saved, self.pks)
+
+    def test_that_resume_requires_checkpoint_dir(self):
+        settings.CHECKPOINT_DIR = None
+        with self.assertRaises(ImproperlyConfigured):
+            self.idx.update_index(resume=True, warm=False)
+        self.assertEqual(self.idx.update_index(warm=False), 5)
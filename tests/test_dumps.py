@@ -0,0 +1,134 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from elasticsearch_dsl.connections import connections
+
+import springy
+from springy.backends.memory import MemoryElasticsearch
+from springy.dumps import get_dump_filenames, read_dump
+
+from .test_indices import MyModel
+
+
+class DumpsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        connections.add_connection('default', MemoryElasticsearch())
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.idx.save_many([
+            MyModel(pk=x, test_field='product %d' % x)
+            for x in range(1, 21)])
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_every_slice_is_exported_to_own_file(self):
+        count = self.idx.export_index(self.path, slices=3, chunk_size=4)
+
+        self.assertEqual(count, 20)
+        self.assertEqual(len(get_dump_filenames(self.path, 'products')), 3)
+
+    def test_that_exported_documents_are_imported(self):
+        self.idx.export_index(self.path, slices=3, chunk_size=4)
+
+        connections.remove_connection('default')
+        client = MemoryElasticsearch()
+        connections.add_connection('default', client)
+
+        count = self.idx.import_index(self.path, chunk_size=7)
+
+        self.assertEqual(count, 20)
+        self.assertEqual(len(self.idx.all()), 20)
+        self.assertEqual(
+                list(self.idx.filter('ids', values=['7']).values_list(
+                    'test_field', flat=True)), ['product 7'])
+        self.assertIn('products', client.indices.get_mapping())
+
+    def test_that_import_without_dump_files_fails(self):
+        with self.assertRaises(IOError):
+            self.idx.import_index(self.path)
+
+    def test_that_files_of_previous_export_are_removed(self):
+        self.idx.export_index(self.path, slices=4)
+        self.idx.export_index(self.path, slices=2)
+
+        self.assertEqual(
+                [os.path.basename(x) for x in get_dump_filenames(
+                    self.path, 'products')],
+                ['products.0.ndjson.gz', 'products.1.ndjson.gz'])
+
+    def test_that_documents_of_reindexed_index_are_imported_to_index(self):
+        self.idx.reindex(poll_interval=0)
+        self.idx.export_index(self.path, slices=2)
+
+        connections.remove_connection('default')
+        client = MemoryElasticsearch()
+        connections.add_connection('default', client)
+
+        self.idx.import_index(self.path)
+
+        self.assertEqual(list(client._indices), ['products'])
+        self.assertEqual(len(self.idx.all()), 20)
+
+
+class PartitionedDumpsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        connections.add_connection('default', MemoryElasticsearch())
+
+        class EventIndex(springy.Index):
+            created = springy.fields.Date()
+
+            class Meta:
+                fields = ('test_field', 'created')
+                model = MyModel
+                index = 'events'
+                partition_field = 'created'
+
+            def prepare_created(self, obj):
+                return datetime.date(2017, int(obj.pk), 1)
+
+        self.idx = EventIndex()
+        self.idx.initialize()
+        self.idx.save_many([
+            MyModel(pk=1, test_field='signup'),
+            MyModel(pk=2, test_field='purchase'),
+            ])
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_partition_names_are_rewritten_to_target_index(self):
+        self.idx.export_index(self.path, slices=1)
+        filename = get_dump_filenames(self.path, 'events')[0]
+
+        self.assertEqual(
+                sorted(x['_index'] for x in read_dump(
+                    filename, partitions_of='archive')),
+                ['archive-2017.01', 'archive-2017.02'])
+
+    def test_that_documents_are_imported_to_partitions(self):
+        self.idx.export_index(self.path, slices=1)
+
+        connections.remove_connection('default')
+        connections.add_connection('default', MemoryElasticsearch())
+
+        self.assertEqual(self.idx.import_index(self.path), 2)
+        self.assertEqual(
+                self.idx.get_partitions(),
+                ['events-2017.01', 'events-2017.02'])
@@ -6,6 +6,18 @@ from django.conf import settings
 
 settings.configure(**{
     'ALLOWED_HOSTS': ['testserver'],
+    'DATABASES': {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+            },
+        'other': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+            },
+        },
+    'INSTALLED_APPS': ['springy'],
+    'SPRINGY_AUTODISCOVER': False,
     })
 
 django.setup()
@@ -79,6 +91,63 @@ class PreparingDocTypeTestCase(unittest.TestCase):
         dt = self.simple_idx.to_doctype(self.obj)
         self.assertEqual(dt.special_field, 'special value')
 
+    def test_that_partial_doc_contains_only_requested_model_fields(self):
+        doc = self.simple_idx.to_partial_doc(self.obj, ['test_field'])
+        self.assertEqual(doc, {'test_field': 'test value'})
+
+    def test_that_partial_doc_contains_prepared_values(self):
+        doc = self.simple_idx.to_partial_doc(self.obj, ['special_field'])
+        self.assertEqual(doc, {'special_field': 'special value'})
+
+    def test_that_partial_doc_sends_empty_values_as_nulls(self):
+        obj = MyModel(test_field=None)
+        doc = self.simple_idx.to_partial_doc(obj, ['test_field'])
+        self.assertEqual(doc, {'test_field': None})
+
+    def test_that_partial_doc_with_undefined_field_raises_an_exception(self):
+        with self.assertRaises(springy.exceptions.FieldDoesNotExist):
+            self.simple_idx.to_partial_doc(self.obj, ['undefined_field'])
+
+
+class ValuesRowsIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        class ValuesTestIndex(springy.Index):
+            related_name = String()
+
+            class Meta:
+                fields = ('test_field', 'related', 'related_name')
+                model = WithRelatedFieldModel
+                index = 'values'
+                use_values = True
+                values_fields = ('related__test_related_field',)
+
+            def prepare_related_name(self, row):
+                return row['related__test_related_field']
+
+        self.idx = ValuesTestIndex()
+        self.row = {
+            'pk': 1,
+            'test_field': 'test value',
+            'related_id': 2,
+            'related__test_related_field': 'related value',
+            }
+
+    def tearDown(self):
+        springy.registry.unregister_all()
+
+    def test_that_only_mapped_columns_are_fetched(self):
+        self.assertEqual(self.idx.get_values_columns(), {
+            'test_field': 'test_field',
+            'related': 'related_id',
+            })
+
+    def test_that_doctype_is_built_from_values_row(self):
+        dt = self.idx.to_doctype(self.row)
+        self.assertEqual(dt.meta.id, 1)
+        self.assertEqual(dt.test_field, 'test value')
+        self.assertEqual(dt.related, 2)
+        self.assertEqual(dt.related_name, 'related value')
+
 
 class IndexDefinitionTestCase(unittest.TestCase):
     def test_that_using_undefined_field_raises_an_exception(self):
@@ -90,6 +159,55 @@ class IndexDefinitionTestCase(unittest.TestCase):
                     index = 'undefined'
 
 
+class PartitionedIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        class EventIndex(springy.Index):
+            created = springy.fields.Date()
+
+            class Meta:
+                fields = ('test_field', 'created')
+                model = MyModel
+                index = 'events'
+                partition_field = 'created'
+                partition_period = 'month'
+
+            def prepare_created(self, obj):
+                return obj.created
+
+        self.idx = EventIndex()
+        self.obj = MyModel(pk=1, test_field='event')
+        self.obj.created = datetime.datetime(2017, 3, 15, 12)
+
+    def tearDown(self):
+        springy.registry.unregister_all()
+
+    def test_that_documents_are_routed_to_partitions(self):
+        dt = self.idx.to_doctype(self.obj)
+        self.assertEqual(dt.meta.index, 'events-2017.03')
+
+    def test_that_search_uses_partitions_alias(self):
+        self.assertEqual(self.idx.all()._index, ['events'])
+
+    def test_that_partition_is_taken_from_prepared_field(self):
+        self.idx.prepare_created = lambda obj: datetime.date(2018, 1, 2)
+        self.assertEqual(
+                self.idx.get_document_index(self.obj), 'events-2018.01')
+
+    def test_that_date_range_restricts_searched_partitions(self):
+        search = self.idx.partitions(
+                datetime.date(2017, 1, 10), datetime.date(2017, 2, 10))
+        self.assertEqual(search._index, ['events-2017.01', 'events-2017.02'])
+
+    def test_that_undefined_partition_field_raises_an_exception(self):
+        with self.assertRaises(springy.exceptions.FieldDoesNotExist):
+            class MissingPartitionFieldIndex(springy.Index):
+                class Meta:
+                    fields = ('test_field',)
+                    model = MyModel
+                    index = 'missing_partition_field'
+                    partition_field = 'created'
+
+
 class IndexRegistryTestCase(unittest.TestCase):
     def tearDown(self):
         springy.registry.unregister_all()
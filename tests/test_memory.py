@@ -0,0 +1,637 @@
+import datetime
+import logging
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from elasticsearch_dsl.connections import connections
+
+import springy
+from springy import settings
+from springy.backends.memory import MemoryElasticsearch
+from springy.utils import ValuesRow
+
+from .test_indices import MyModel, RelatedModel, WithRelatedFieldModel
+
+
+class MemoryBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.objects = [
+                MyModel(pk=1, test_field='wireless mouse'),
+                MyModel(pk=2, test_field='mechanical keyboard'),
+                MyModel(pk=3, test_field='wireless keyboard'),
+                ]
+        self.idx.save_many(self.objects)
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_initialize_creates_index_with_mapping(self):
+        doc_type = self.idx._meta.document._doc_type.name
+        mapping = self.client.indices.get_mapping(index='products')
+        self.assertIn(
+                'test_field',
+                mapping['products']['mappings'][doc_type]['properties'])
+
+    def test_that_initialize_of_unchanged_index_does_nothing(self):
+        self.assertEqual(
+                self.idx.initialize(dry_run=True).describe(),
+                ['nothing to do'])
+
+    def test_that_new_multi_field_is_added_to_existing_field(self):
+        doc_type = self.idx._meta.document._doc_type.name
+        self.idx._meta.document._doc_type.mapping.field(
+                'test_field', springy.fields.String(
+                    fields={'raw': springy.fields.Keyword()}))
+
+        plan = self.idx.initialize()
+
+        self.assertEqual(list(plan.new_fields), ['test_field.raw'])
+        mapping = self.client.indices.get_mapping(index='products')
+        self.assertEqual(
+                mapping['products']['mappings'][doc_type]['properties'][
+                    'test_field']['fields'], {'raw': {'type': 'keyword'}})
+
+    def test_counting_documents(self):
+        self.assertEqual(len(self.idx.all()), 3)
+
+    def test_that_len_is_number_of_all_matching_documents(self):
+        for search in (
+                self.idx.all()[:2],
+                self.idx.all()[:2].values('test_field'),
+                self.idx.all()[:2].compact('test_field')):
+            self.assertEqual(len(search), 3)
+            self.assertEqual(search.page_length(), 2)
+
+    def test_match_query(self):
+        ids = self.idx.query('match', test_field='wireless').ids()
+        self.assertEqual(sorted(ids), ['1', '3'])
+
+    def test_query_string(self):
+        result = self.idx.query_string('wireless AND keyboard')
+        self.assertEqual(result.ids(), ['3'])
+
+    def test_bool_query_with_must_not(self):
+        result = self.idx.query(
+                'bool', must=[{'match': {'test_field': 'keyboard'}}],
+                must_not=[{'term': {'test_field': 'wireless'}}])
+        self.assertEqual(result.ids(), ['2'])
+
+    def test_saving_single_document(self):
+        self.idx.save(MyModel(pk=4, test_field='usb hub'))
+        self.assertEqual(self.idx.query('term', test_field='hub').ids(), ['4'])
+
+    def test_partial_update(self):
+        self.idx.update_fields(
+                [MyModel(pk=1, test_field='wired mouse')], ['test_field'])
+        self.assertEqual(self.idx.query('match', test_field='wired').ids(),
+                         ['1'])
+
+    def test_bulk_delete_treats_missing_documents_as_success(self):
+        deleted = self.idx.delete_many([1, 2, 99], fail_silently=True)
+        self.assertEqual(deleted, 2)
+        self.assertEqual(len(self.idx.all()), 1)
+
+    def test_bulk_delete_of_missing_documents_raises_an_exception(self):
+        with self.assertRaises(springy.exceptions.DocumentDoesNotExist):
+            self.idx.delete_many([99])
+
+    def test_clearing_index(self):
+        self.idx.clear_index()
+        self.assertEqual(len(self.idx.all()), 0)
+
+    def test_multisearch(self):
+        ms = self.idx.multisearch([
+            self.idx.query('match', test_field='mouse'),
+            self.idx.query('match', test_field='keyboard'),
+            ])
+        self.assertEqual([len(x.hits) for x in ms.execute()], [1, 2])
+
+
+class ListQuerySet(list):
+    def filter(self, pk__in):
+        pks = set(str(x) for x in pk__in)
+        return ListQuerySet(x for x in self if str(x.pk) in pks)
+
+
+class UpdateManyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        queryset = ListQuerySet([
+            MyModel(pk=1, test_field='wireless mouse'),
+            MyModel(pk=3, test_field='wireless keyboard'),
+            ])
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+            def get_query_set(self):
+                return queryset
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.idx.save_many([
+            MyModel(pk=1, test_field='mouse'),
+            MyModel(pk=2, test_field='keyboard'),
+            ])
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_matching_objects_are_indexed(self):
+        self.idx.update_many([MyModel(pk=1), MyModel(pk=3)])
+        self.assertEqual(
+                sorted(self.idx.query('match', test_field='wireless').ids()),
+                ['1', '3'])
+
+    def test_that_not_matching_objects_are_deleted(self):
+        result = self.idx.update_many(
+                [MyModel(pk=1), MyModel(pk=2), MyModel(pk=4)], chunk_size=2)
+        self.assertEqual(result, (1, 1))
+        self.assertEqual(self.idx.all().ids(), ['1'])
+
+
+class CrossIndexSearchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        products = ListQuerySet([
+            MyModel(pk=1, test_field='red mouse'),
+            MyModel(pk=2, test_field='red red keyboard'),
+            ])
+        categories = ListQuerySet([
+            RelatedModel(pk=1, test_related_field='red red red things'),
+            ])
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+            def get_query_set(self):
+                return products
+
+        class CategoryIndex(springy.Index):
+            class Meta:
+                fields = ('test_related_field',)
+                model = RelatedModel
+                index = 'categories'
+
+            def get_query_set(self):
+                return categories
+
+        for idx in (ProductIndex(), CategoryIndex()):
+            idx.initialize()
+            idx.save_many(idx.get_query_set())
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_hits_are_hydrated_to_their_models(self):
+        search = springy.query('products', 'categories').query(
+                'multi_match', query='red',
+                fields=['test_field', 'test_related_field'])
+        objects = search.objects()
+
+        self.assertEqual(
+                [(type(x), x.pk) for x in objects],
+                [(RelatedModel, 1), (MyModel, 2), (MyModel, 1)])
+
+    def test_that_unknown_index_is_not_resolved(self):
+        with self.assertRaises(springy.indices.NotRegisteredError):
+            springy.registry.get_for_index_name('unknown')
+
+
+class ValuesRowsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            editor.create_model(RelatedModel)
+            editor.create_model(WithRelatedFieldModel)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            editor.delete_model(WithRelatedFieldModel)
+            editor.delete_model(RelatedModel)
+
+    def setUp(self):
+        connections.add_connection('default', MemoryElasticsearch())
+
+        class ValuesIndex(springy.Index):
+            related_name = springy.fields.String()
+
+            class Meta:
+                fields = ('test_field', 'related_name')
+                model = WithRelatedFieldModel
+                index = 'values'
+                use_values = True
+                values_fields = ('related__test_related_field',)
+
+            def prepare_related_name(self, row):
+                return row['related__test_related_field']
+
+        self.idx = ValuesIndex()
+        self.idx.initialize()
+        related = RelatedModel.objects.create(test_related_field='acme')
+        self.objects = [
+                WithRelatedFieldModel.objects.create(
+                    test_field='product %d' % x, related=related)
+                for x in range(5)]
+
+    def tearDown(self):
+        WithRelatedFieldModel.objects.all().delete()
+        RelatedModel.objects.all().delete()
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_related_values_are_fetched_once_per_chunk(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.idx.save_many(self.objects, chunk_size=10)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+                len(self.idx.query('match', related_name='acme').ids()), 5)
+
+    def test_that_partial_updates_fetch_related_values_once_per_chunk(self):
+        self.idx.save_many(self.objects)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.idx.update_fields(
+                    self.objects, ['related_name'], chunk_size=2)
+
+        self.assertEqual(len(queries), 3)
+
+
+class RoutingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        class TenantIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'tenants'
+                routing_field = 'test_field'
+
+        self.idx = TenantIndex()
+        self.idx.initialize()
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_documents_are_saved_with_routing(self):
+        self.idx.save_many([MyModel(pk=1, test_field='acme')])
+        doc = self.client._indices['tenants'].docs['1']
+        self.assertEqual(doc.routing, 'acme')
+
+    def test_that_search_is_limited_with_routing(self):
+        search = self.idx.filter('term', test_field='acme', routing='acme')
+        self.assertEqual(search._params, {'routing': 'acme'})
+
+    def test_that_routed_documents_can_not_be_deleted_by_pk(self):
+        with self.assertRaises(ValueError):
+            self.idx.delete_many([1])
+
+    def test_that_foreign_key_routing_uses_raw_id(self):
+        class RelatedRoutingIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = WithRelatedFieldModel
+                index = 'related_routing'
+                routing_field = 'related'
+
+        class ValuesRelatedRoutingIndex(RelatedRoutingIndex):
+            class Meta:
+                fields = ('test_field',)
+                model = WithRelatedFieldModel
+                index = 'values_related_routing'
+                routing_field = 'related'
+                use_values = True
+
+        obj = WithRelatedFieldModel(pk=1, test_field='acme', related_id=7)
+        self.assertEqual(
+                RelatedRoutingIndex().get_action_meta(obj)['_routing'], '7')
+        self.assertEqual(
+                ValuesRelatedRoutingIndex()._get_values_column_names(),
+                set(['related_id', 'test_field']))
+        row = ValuesRow(pk=1, test_field='acme', related_id=7)
+        self.assertEqual(
+                ValuesRelatedRoutingIndex().get_action_meta(row)['_routing'],
+                '7')
+
+    def test_that_custom_routing_is_detected(self):
+        class CustomRoutingIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'custom_routing'
+
+            def get_routing(self, obj):
+                return obj.pk % 10
+
+        class PlainIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'plain'
+
+        self.assertTrue(CustomRoutingIndex().is_routed)
+        self.assertFalse(PlainIndex().is_routed)
+
+
+class PartitionedIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        class EventIndex(springy.Index):
+            created = springy.fields.Date()
+
+            class Meta:
+                fields = ('test_field', 'created')
+                model = MyModel
+                index = 'events'
+                partition_field = 'created'
+
+            def prepare_created(self, obj):
+                return datetime.date(2017, int(obj.pk), 1)
+
+        self.client.indices.create(index='events-audit')
+        self.client.index(
+                index='events-audit', doc_type='audit', id=1,
+                body={'test_field': 'login'})
+        self.idx = EventIndex()
+        self.idx.initialize()
+
+        self.idx.save_many([
+            MyModel(pk=1, test_field='signup'),
+            MyModel(pk=2, test_field='purchase'),
+            ])
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_documents_are_stored_in_partitions(self):
+        self.assertEqual(
+                self.idx.get_partitions(),
+                ['events-2017.01', 'events-2017.02'])
+
+    def test_that_search_skips_indices_sharing_the_prefix(self):
+        self.assertEqual(self.idx.all().count(), 2)
+
+    def test_that_clearing_index_keeps_indices_sharing_the_prefix(self):
+        self.idx.clear_index()
+        self.assertEqual(self.idx.all().count(), 0)
+        self.assertTrue(self.client.indices.exists(index='events-audit'))
+
+    def test_that_dropping_index_keeps_indices_sharing_the_prefix(self):
+        self.idx.drop_index()
+        self.assertEqual(list(self.client._indices), ['events-audit'])
+        self.assertFalse(self.client.indices.exists_template(name='events'))
+
+    def test_deleting_queryset_with_prepared_partition_field(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(MyModel)
+        try:
+            MyModel.objects.create(pk=1, test_field='signup')
+            self.idx.delete_queryset(MyModel.objects.all())
+        finally:
+            with connection.schema_editor() as editor:
+                editor.delete_model(MyModel)
+
+        self.assertEqual(self.idx.all().ids(), ['2'])
+
+    def test_that_search_of_index_without_partitions_is_empty(self):
+        self.idx.clear_index()
+        self.assertEqual(self.idx.all().count(), 0)
+
+
+class ReindexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.idx.save_many([
+            MyModel(pk=1, test_field='wireless mouse'),
+            MyModel(pk=2, test_field='mechanical keyboard'),
+            ])
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_concrete_index_is_replaced_with_alias(self):
+        new_index = self.idx.reindex(poll_interval=0)
+
+        self.assertEqual(
+                list(self.client.indices.get_alias(name='products')),
+                [new_index])
+        self.assertEqual(sorted(self.idx.all().ids()), ['1', '2'])
+
+    def test_that_alias_is_swapped_and_old_index_deleted(self):
+        first = self.idx.reindex(poll_interval=0)
+        self.idx.get_versioned_index_name = lambda: 'products-second'
+
+        second = self.idx.reindex(poll_interval=0)
+
+        self.assertEqual(
+                list(self.client.indices.get_alias(name='products')),
+                [second])
+        self.assertFalse(self.client.indices.exists(index=first))
+        self.assertEqual(len(self.idx.all()), 2)
+
+    def test_that_versioned_index_names_are_unique(self):
+        first = self.idx.get_versioned_index_name()
+        second = self.idx.get_versioned_index_name()
+
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.startswith('products-'))
+
+    def test_that_progress_is_reported(self):
+        statuses = []
+        self.idx.reindex(poll_interval=0, progress=statuses.append)
+        self.assertEqual(statuses[-1]['total'], 2)
+
+    def test_that_reindexed_hits_are_resolved_to_index(self):
+        new_index = self.idx.reindex(poll_interval=0)
+        self.assertIs(
+                springy.registry.get_for_index_name(new_index),
+                type(self.idx))
+
+
+class SuggestTestCase(unittest.TestCase):
+    def setUp(self):
+        connections.add_connection('default', MemoryElasticsearch())
+
+        class ProductIndex(springy.Index):
+            test_field = springy.fields.SearchAsYouType()
+
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.idx.save_many([
+            MyModel(pk=1, test_field='Wireless mouse'),
+            MyModel(pk=2, test_field='wired keyboard'),
+            MyModel(pk=3, test_field='usb hub'),
+            ])
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_suggest_subfield_is_mapped(self):
+        properties = self.idx._meta.document._doc_type.mapping.to_dict()
+        field = list(properties.values())[0]['properties']['test_field']
+        self.assertEqual(field['fields']['suggest']['type'], 'completion')
+
+    def test_that_suggestions_match_prefix(self):
+        self.assertEqual(
+                sorted(self.idx.suggest('wi')),
+                [('Wireless mouse', '1'), ('wired keyboard', '2')])
+        self.assertEqual(self.idx.suggest('wirel'), [('Wireless mouse', '1')])
+
+    def test_that_short_prefix_is_cached(self):
+        self.assertEqual(len(self.idx.suggest('us')), 1)
+        connections.get_connection().indices.delete(index='products')
+        self.assertEqual(len(self.idx.suggest('us')), 1)
+
+    def test_that_cache_is_invalidated_on_write(self):
+        self.assertEqual(len(self.idx.suggest('us')), 1)
+        self.idx.save(MyModel(pk=4, test_field='usb cable'))
+        self.assertEqual(len(self.idx.suggest('us')), 2)
+
+
+class ProfilingTestCase(unittest.TestCase):
+    def setUp(self):
+        connections.add_connection('default', MemoryElasticsearch())
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.idx.save(MyModel(pk=1, test_field='wireless mouse'))
+
+    def tearDown(self):
+        settings.SLOW_QUERY_THRESHOLD = None
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_profile_returns_clauses(self):
+        clauses = self.idx.query(
+                'bool', must=[{'match': {'test_field': 'mouse'}}]).profile()
+        self.assertEqual(
+                [(x['type'], x['depth']) for x in clauses],
+                [('bool', 0), ('match', 1)])
+
+    def test_that_slow_query_is_logged(self):
+        settings.SLOW_QUERY_THRESHOLD = 0
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('springy.slow_query')
+        logger.addHandler(handler)
+        try:
+            list(self.idx.query('match', test_field='mouse'))
+        finally:
+            logger.removeHandler(handler)
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].indices, ['products'])
+        self.assertIn('query', records[0].body)
+
+    def test_that_fast_query_is_not_logged(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('springy.slow_query')
+        logger.addHandler(handler)
+        try:
+            list(self.idx.query('match', test_field='mouse'))
+        finally:
+            logger.removeHandler(handler)
+
+        self.assertEqual(records, [])
+
+
+class WarmupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+                warmup_queries = [
+                    {'query': {'match': {'test_field': 'mouse'}}},
+                    ]
+
+            def get_warmup_queries(self):
+                return super(ProductIndex, self).get_warmup_queries() + [
+                        self.query('match', test_field='keyboard')]
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        self.idx.save(MyModel(pk=1, test_field='wireless mouse'))
+
+        self.searches = []
+        search = self.client.search
+
+        def tracked_search(index=None, **kwargs):
+            self.searches.append(index)
+            return search(index=index, **kwargs)
+        self.client.search = tracked_search
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_warmup_queries_are_run(self):
+        self.assertEqual(self.idx.warm(max_num_segments=1), [0, 0])
+        self.assertEqual(self.searches, ['products', 'products'])
+
+    def test_that_new_index_is_warmed_before_alias_swap(self):
+        new_index = self.idx.reindex(poll_interval=0)
+        self.assertEqual(self.searches[-2:], [new_index, new_index])
@@ -0,0 +1,152 @@
+import unittest
+
+from django.db import connections as db_connections, transaction
+from django.db.models.signals import post_init
+from elasticsearch.exceptions import ConnectionError
+from elasticsearch_dsl.connections import connections
+
+import springy
+from springy import outbox
+from springy.backends.memory import MemoryElasticsearch
+from springy.models import OutboxEntry
+from springy.outbox import collapse_entries, delete_action
+
+from .test_indices import MyModel
+
+
+class Entry(object):
+    def __init__(self, index, object_id, action, document_index='',
+                 routing=None):
+        self.index = index
+        self.object_id = object_id
+        self.action = action
+        self.document_index = document_index
+        self.routing = routing
+
+
+class CollapseEntriesTestCase(unittest.TestCase):
+    def test_that_entries_are_grouped_by_index(self):
+        grouped = collapse_entries([
+            Entry('products', '1', 'index'),
+            Entry('orders', '1', 'index'),
+            Entry('products', '2', 'index'),
+            ])
+
+        self.assertEqual(list(grouped), ['products', 'orders'])
+        self.assertEqual(list(grouped['products']), ['1', '2'])
+
+    def test_that_latest_action_wins(self):
+        grouped = collapse_entries([
+            Entry('products', '1', 'index'),
+            Entry('products', '1', 'delete'),
+            Entry('products', '2', 'delete'),
+            Entry('products', '2', 'index'),
+            ])
+
+        self.assertEqual(grouped['products']['1'].action, 'delete')
+        self.assertEqual(grouped['products']['2'].action, 'index')
+
+
+class DeleteActionTestCase(unittest.TestCase):
+    def test_that_plain_entry_has_only_id(self):
+        self.assertEqual(
+                delete_action(Entry('products', '1', 'delete')),
+                {'_id': '1'})
+
+    def test_that_index_and_routing_are_passed(self):
+        entry = Entry(
+                'products', '1', 'delete', document_index='products-2020.01',
+                routing='7')
+        self.assertEqual(delete_action(entry), {
+            '_id': '1', '_index': 'products-2020.01', '_routing': '7'})
+
+
+class OutboxTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        for db in ('default', 'other'):
+            with db_connections[db].schema_editor() as editor:
+                editor.create_model(OutboxEntry)
+                editor.create_model(MyModel)
+
+    @classmethod
+    def tearDownClass(cls):
+        for db in ('default', 'other'):
+            with db_connections[db].schema_editor() as editor:
+                editor.delete_model(MyModel)
+                editor.delete_model(OutboxEntry)
+
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+        outbox.connect_signals()
+
+    def tearDown(self):
+        outbox.disconnect_signals()
+        for db in ('default', 'other'):
+            MyModel.objects.using(db).all().delete()
+            OutboxEntry.objects.using(db).all().delete()
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_entries_are_recorded_in_transaction(self):
+        MyModel.objects.create(test_field='mouse')
+        try:
+            with transaction.atomic():
+                MyModel.objects.create(test_field='keyboard')
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertEqual(
+                list(OutboxEntry.objects.values_list('index', 'action')),
+                [('products', 'index')])
+
+    def test_that_consumed_entries_are_applied_and_removed(self):
+        kept = MyModel.objects.create(test_field='mouse')
+        removed = MyModel.objects.create(test_field='keyboard')
+        removed.delete()
+
+        self.assertEqual(outbox.consume(), 3)
+
+        self.assertEqual(self.idx.all().ids(), [str(kept.pk)])
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    def test_that_entries_survive_failing_cluster(self):
+        MyModel.objects.create(test_field='mouse')
+
+        def bulk(*args, **kwargs):
+            raise ConnectionError('N/A', 'cluster is down', None)
+        self.client.bulk = bulk
+
+        with self.assertRaises(ConnectionError):
+            outbox.consume()
+        self.assertEqual(OutboxEntry.objects.count(), 1)
+
+    def test_that_entries_are_recorded_on_database_of_saved_object(self):
+        MyModel.objects.using('other').create(test_field='mouse')
+
+        self.assertFalse(OutboxEntry.objects.exists())
+        self.assertEqual(OutboxEntry.objects.using('other').count(), 1)
+
+    def test_that_entries_of_not_registered_indices_are_kept(self):
+        OutboxEntry.objects.create(
+                index='removed', object_id='1', action='index')
+
+        self.assertEqual(outbox.consume(), 0)
+        self.assertEqual(OutboxEntry.objects.count(), 1)
+
+    def test_that_disconnecting_signals_stops_tracking_changes(self):
+        outbox.disconnect_signals()
+        self.assertFalse([
+            x for x in post_init.receivers
+            if x[0][0] == 'springy_track_changes'])
@@ -0,0 +1,39 @@
+import datetime
+import unittest
+
+from springy.partitions import partition_suffix, partition_suffixes
+
+
+class PartitionSuffixTestCase(unittest.TestCase):
+    def test_monthly_suffix(self):
+        self.assertEqual(
+                partition_suffix(datetime.date(2017, 3, 15), 'month'),
+                '2017.03')
+
+    def test_daily_suffix_of_datetime(self):
+        self.assertEqual(
+                partition_suffix(
+                    datetime.datetime(2017, 3, 15, 12, 30), 'day'),
+                '2017.03.15')
+
+    def test_that_unknown_period_raises_an_exception(self):
+        with self.assertRaises(ValueError):
+            partition_suffix(datetime.date(2017, 3, 15), 'decade')
+
+    def test_that_empty_date_raises_an_exception(self):
+        with self.assertRaises(ValueError):
+            partition_suffix(None, 'month')
+
+
+class PartitionSuffixesTestCase(unittest.TestCase):
+    def test_months_touched_by_date_range(self):
+        self.assertEqual(
+                partition_suffixes(
+                    datetime.date(2016, 11, 30), datetime.date(2017, 2, 1),
+                    'month'),
+                ['2016.11', '2016.12', '2017.01', '2017.02'])
+
+    def test_single_day_range(self):
+        day = datetime.datetime(2017, 3, 15, 10)
+        self.assertEqual(
+                partition_suffixes(day, day, 'day'), ['2017.03.15'])
@@ -0,0 +1,112 @@
+import unittest
+
+from springy.planner import (
+        build_initialize_plan, diff_mapping, diff_settings,
+        unflatten_settings)
+
+
+LIVE_SETTINGS = {
+    'index': {
+        'number_of_shards': '5',
+        'number_of_replicas': '1',
+        'creation_date': '1500000000000',
+        'uuid': 'abc',
+        'analysis': {
+            'analyzer': {
+                'default': {
+                    'type': 'snowball',
+                    'language': 'English',
+                    },
+                },
+            },
+        },
+    }
+
+
+class DiffSettingsTestCase(unittest.TestCase):
+    def test_that_equal_settings_produce_no_changes(self):
+        declared = {
+            'number_of_shards': 5,
+            'analysis': {
+                'analyzer': {
+                    'default': {'type': 'snowball', 'language': 'English'},
+                    },
+                },
+            }
+        self.assertEqual(diff_settings(LIVE_SETTINGS, declared), {})
+
+    def test_that_changed_settings_are_reported_as_flat_keys(self):
+        declared = {'number_of_replicas': 2}
+        self.assertEqual(
+                diff_settings(LIVE_SETTINGS, declared),
+                {'number_of_replicas': '2'})
+
+    def test_unflattening_settings(self):
+        self.assertEqual(
+                unflatten_settings({'analyzer.default.type': 'simple'}),
+                {'analyzer': {'default': {'type': 'simple'}}})
+
+
+class DiffMappingTestCase(unittest.TestCase):
+    def test_that_new_fields_are_detected(self):
+        new, changed = diff_mapping(
+                {'properties': {'name': {'type': 'text'}}},
+                {'properties': {
+                    'name': {'type': 'string'},
+                    'price': {'type': 'float'}}})
+        self.assertEqual(new, {'price': {'type': 'float'}})
+        self.assertEqual(changed, [])
+
+    def test_that_changed_field_types_are_detected(self):
+        new, changed = diff_mapping(
+                {'properties': {'price': {'type': 'long'}}},
+                {'properties': {'price': {'type': 'float'}}})
+        self.assertEqual(new, {})
+        self.assertEqual(changed, ['price'])
+
+    def test_that_new_multi_fields_are_detected(self):
+        new, changed = diff_mapping(
+                {'properties': {'name': {'type': 'text'}}},
+                {'properties': {'name': {
+                    'type': 'text',
+                    'fields': {'raw': {'type': 'keyword'}}}}})
+        self.assertEqual(new, {'name.raw': {'type': 'keyword'}})
+        self.assertEqual(changed, [])
+
+    def test_that_object_properties_are_compared(self):
+        new, changed = diff_mapping(
+                {'properties': {'category': {'properties': {
+                    'name': {'type': 'text'}}}}},
+                {'properties': {'category': {
+                    'type': 'object',
+                    'properties': {
+                        'name': {'type': 'keyword'},
+                        'slug': {'type': 'keyword'}}}}})
+        self.assertEqual(new, {'category.slug': {'type': 'keyword'}})
+        self.assertEqual(changed, ['category.name'])
+
+
+class InitializePlanTestCase(unittest.TestCase):
+    def test_that_unchanged_index_is_not_closed(self):
+        plan = build_initialize_plan(
+                'products', LIVE_SETTINGS, {'number_of_replicas': 2})
+        self.assertFalse(plan.requires_close)
+        self.assertEqual(plan.dynamic_settings, {'number_of_replicas': '2'})
+
+    def test_that_analysis_change_requires_close(self):
+        plan = build_initialize_plan(
+                'products', LIVE_SETTINGS, {
+                    'analysis': {'analyzer': {'default': {'type': 'simple'}}}
+                    })
+        self.assertTrue(plan.requires_close)
+        self.assertEqual(plan.analysis, {'analyzer.default.type': 'simple'})
+
+    def test_that_number_of_shards_is_skipped(self):
+        plan = build_initialize_plan(
+                'products', LIVE_SETTINGS, {'number_of_shards': 3})
+        self.assertEqual(plan.skipped_settings, {'number_of_shards': '3'})
+        self.assertTrue(plan.is_empty())
+
+    def test_that_empty_plan_has_nothing_to_do(self):
+        plan = build_initialize_plan('products', LIVE_SETTINGS, {})
+        self.assertEqual(plan.describe(), ['nothing to do'])
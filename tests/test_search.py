@@ -0,0 +1,170 @@
+import unittest
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+from elasticsearch_dsl.response import Response
+
+from springy.compact import CompactResult
+from springy.search import IterableSearch, condense_profile
+
+
+RAW_RESPONSE = {
+    'hits': {
+        'total': 2,
+        'hits': [
+            {'_id': '1', '_score': 2.5,
+             '_source': {'name': 'mouse', 'price': {'net': 10}}},
+            {'_id': '2', '_score': 1.5,
+             '_source': {'name': 'keyboard'}},
+            ],
+        },
+    }
+
+
+def search_with_response(search):
+    search._cached_raw_result = RAW_RESPONSE
+    return search
+
+
+class ValuesTestCase(unittest.TestCase):
+    def test_that_values_limit_source_fields(self):
+        s = IterableSearch().values('_id', 'name')
+        self.assertEqual(s.to_dict()['_source'], ['name'])
+
+    def test_that_values_yield_dicts(self):
+        s = search_with_response(IterableSearch().values('_id', 'name'))
+        self.assertEqual(list(s), [
+            {'_id': '1', 'name': 'mouse'},
+            {'_id': '2', 'name': 'keyboard'},
+            ])
+
+    def test_that_values_list_yields_tuples_with_dotted_fields(self):
+        s = search_with_response(
+                IterableSearch().values_list('name', 'price.net'))
+        self.assertEqual(list(s), [('mouse', 10), ('keyboard', None)])
+
+    def test_that_flat_values_list_yields_values(self):
+        s = search_with_response(
+                IterableSearch().values_list('_score', flat=True))
+        self.assertEqual(list(s), [2.5, 1.5])
+
+    def test_that_flat_values_list_with_many_fields_raises_an_exception(self):
+        with self.assertRaises(TypeError):
+            IterableSearch().values_list('name', 'price', flat=True)
+
+    def test_that_values_survive_cloning(self):
+        s = IterableSearch().values('name').filter('term', name='mouse')
+        self.assertEqual(s._values, (('name',), False, True))
+
+
+PROFILE = {
+    'shards': [
+        {'searches': [{'query': [{
+            'type': 'BooleanQuery', 'description': 'name:mouse +price:10',
+            'time_in_nanos': 3000000,
+            'children': [
+                {'type': 'TermQuery', 'description': 'name:mouse',
+                 'time_in_nanos': 2000000},
+                {'type': 'TermQuery', 'description': 'price:10',
+                 'time_in_nanos': 500000},
+                ]}]}]},
+        {'searches': [{'query': [{
+            'type': 'BooleanQuery', 'description': 'name:mouse +price:10',
+            'time': '1.5ms',
+            'children': [
+                {'type': 'TermQuery', 'description': 'name:mouse',
+                 'time': '500micros'},
+                ]}]}]},
+        ],
+    }
+
+
+class CondenseProfileTestCase(unittest.TestCase):
+    def test_that_clauses_are_summed_over_shards(self):
+        clauses = condense_profile(PROFILE)
+
+        self.assertEqual(
+                [(x['description'], x['depth'], x['shards'])
+                 for x in clauses],
+                [('name:mouse +price:10', 0, 2), ('name:mouse', 1, 2),
+                 ('price:10', 1, 1)])
+        self.assertAlmostEqual(clauses[0]['time_ms'], 4.5)
+        self.assertAlmostEqual(clauses[1]['time_ms'], 2.5)
+
+    def test_that_empty_profile_has_no_clauses(self):
+        self.assertEqual(condense_profile(None), [])
+
+
+def make_response(size):
+    return {
+        'took': 5,
+        'hits': {
+            'total': size,
+            'hits': [{
+                '_index': 'products', '_type': 'product', '_id': str(x),
+                '_score': 1.0 / (x + 1), 'sort': [x],
+                '_source': {
+                    'name': 'product %d' % x, 'price': {'net': x},
+                    'description': 'long description %d' % x * 5,
+                    },
+                } for x in range(size)],
+            },
+        }
+
+
+def traced_size(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+class CompactResultTestCase(unittest.TestCase):
+    def setUp(self):
+        self.result = CompactResult(make_response(3), ['name', 'price.net'])
+
+    def test_that_hits_are_materialized_from_columns(self):
+        hit = self.result[1]
+        self.assertEqual(hit.name, 'product 1')
+        self.assertEqual(hit['price.net'], 1)
+        self.assertEqual(hit.meta.id, '1')
+        self.assertEqual(hit.meta.score, 0.5)
+        self.assertEqual(hit.meta.index, 'products')
+        self.assertEqual(hit.meta.sort, [1])
+        self.assertEqual(hit.to_dict(), {'name': 'product 1', 'price.net': 1})
+
+    def test_that_not_selected_fields_are_not_stored(self):
+        with self.assertRaises(AttributeError):
+            self.result[0].description
+
+    def test_iteration_and_slicing(self):
+        self.assertEqual([x.meta.id for x in self.result], ['0', '1', '2'])
+        self.assertEqual([x.meta.id for x in self.result[1:]], ['1', '2'])
+        self.assertEqual(self.result[-1].meta.id, '2')
+        self.assertEqual(len(self.result), 3)
+        self.assertEqual(self.result.total, 3)
+
+    def test_that_compact_search_limits_source(self):
+        s = IterableSearch().compact('name')
+        self.assertEqual(s.to_dict()['_source'], ['name'])
+        self.assertEqual(s._clone()._compact, ('name',))
+
+    @unittest.skipIf(tracemalloc is None, 'tracemalloc is not available')
+    def test_that_compact_result_uses_less_memory(self):
+        def build_response():
+            response = Response(IterableSearch(), make_response(10000))
+            list(response)
+            return response
+
+        def build_compact():
+            return CompactResult(make_response(10000), ['name'])
+
+        full_size, response = traced_size(build_response)
+        compact_size, result = traced_size(build_compact)
+
+        self.assertLess(compact_size * 4, full_size)
@@ -0,0 +1,97 @@
+import unittest
+
+from elasticsearch.helpers import BulkIndexError
+from elasticsearch_dsl.connections import connections
+
+import springy
+from springy.backends.memory import MemoryElasticsearch
+from springy.signals import update_document, is_document_missing
+
+from .test_indices import MyModel
+
+
+class QuerySet(list):
+    def filter(self, pk):
+        return QuerySet(x for x in self if x.pk == pk)
+
+    def exists(self):
+        return bool(self)
+
+
+class UpdateDocumentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = MemoryElasticsearch()
+        connections.add_connection('default', self.client)
+        self.queryset = QuerySet([MyModel(pk=1, test_field='mouse')])
+        queryset = self.queryset
+
+        class ProductIndex(springy.Index):
+            class Meta:
+                fields = ('test_field',)
+                model = MyModel
+                index = 'products'
+
+            def get_query_set(self):
+                return queryset
+
+        self.idx = ProductIndex()
+        self.idx.initialize()
+
+    def tearDown(self):
+        connections.remove_connection('default')
+        springy.registry.unregister_all()
+
+    def test_that_document_of_not_matching_object_is_deleted(self):
+        self.idx.save(MyModel(pk=2, test_field='keyboard'))
+
+        update_document(MyModel, MyModel(pk=2, test_field='keyboard'))
+
+        self.assertEqual(self.idx.all().ids(), [])
+
+    def test_that_object_leaving_queryset_by_update_fields_is_deleted(self):
+        obj = self.queryset.pop()
+        self.idx.save(obj)
+
+        update_document(MyModel, obj, update_fields=['id'])
+
+        self.assertEqual(self.idx.all().ids(), [])
+
+    def test_that_object_entering_queryset_by_update_fields_is_saved(self):
+        update_document(MyModel, self.queryset[0], update_fields=['id'])
+        self.assertEqual(self.idx.all().ids(), ['1'])
+
+    def test_that_missing_document_is_saved_on_partial_update(self):
+        update_document(
+                MyModel, self.queryset[0], update_fields=['test_field'])
+        self.assertEqual(self.idx.all().ids(), ['1'])
+
+    def test_that_other_bulk_errors_are_raised(self):
+        bulk = self.client.bulk
+
+        def failing_bulk(*args, **kwargs):
+            response = bulk(*args, **kwargs)
+            for item in response['items']:
+                item['update'].update({
+                    'status': 400,
+                    'error': {'type': 'mapper_parsing_exception'}})
+            response['errors'] = True
+            return response
+        self.client.bulk = failing_bulk
+
+        with self.assertRaises(BulkIndexError):
+            update_document(
+                    MyModel, self.queryset[0], update_fields=['test_field'])
+        self.assertEqual(self.idx.all().ids(), [])
+
+
+class IsDocumentMissingTestCase(unittest.TestCase):
+    def test_that_only_missing_documents_are_detected(self):
+        missing = {'update': {
+            'status': 404, 'error': {'type': 'document_missing_exception'}}}
+        rejected = {'update': {
+            'status': 429, 'error': {'type': 'es_rejected_execution'}}}
+
+        self.assertTrue(is_document_missing(
+            BulkIndexError('failed', [missing])))
+        self.assertFalse(is_document_missing(
+            BulkIndexError('failed', [missing, rejected])))
@@ -0,0 +1,103 @@
+import unittest
+
+from elasticsearch.helpers import BulkIndexError
+
+from springy.throttling import (
+        TokenBucket, Throttle, parse_rate, is_rejection)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class ParseRateTestCase(unittest.TestCase):
+    def test_that_number_is_documents_rate(self):
+        self.assertEqual(parse_rate('500'), (500.0, 'docs'))
+        self.assertEqual(parse_rate(250), (250.0, 'docs'))
+
+    def test_that_size_is_bytes_rate(self):
+        self.assertEqual(parse_rate('2kb'), (2048.0, 'bytes'))
+        self.assertEqual(parse_rate('1MB'), (1024.0 * 1024, 'bytes'))
+
+    def test_that_invalid_rate_raises_error(self):
+        for value in ('fast', '0', '-5', '5 docs'):
+            with self.assertRaises(ValueError):
+                parse_rate(value)
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.bucket = TokenBucket(10, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_that_burst_up_to_capacity_does_not_wait(self):
+        for x in range(10):
+            self.assertEqual(self.bucket.consume(), 0)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_that_consuming_over_rate_waits(self):
+        for x in range(30):
+            self.bucket.consume()
+        self.assertAlmostEqual(self.clock.now, 2.0)
+
+    def test_that_bucket_is_refilled_with_time(self):
+        self.bucket.consume(10)
+        self.clock.now += 0.5
+        self.assertEqual(self.bucket.consume(5), 0)
+
+
+class ThrottleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.throttle = Throttle(
+                100, max_latency=0.5, clock=self.clock,
+                sleep=self.clock.sleep)
+
+    def test_that_rejection_halves_rate(self):
+        self.throttle.observe(rejected=True)
+        self.assertEqual(self.throttle.rate, 50)
+
+    def test_that_high_latency_halves_rate(self):
+        self.throttle.observe(latency=0.1)
+        self.assertEqual(self.throttle.rate, 100)
+        self.throttle.observe(latency=0.8)
+        self.assertEqual(self.throttle.rate, 50)
+
+    def test_that_rate_is_not_lower_than_minimum(self):
+        for x in range(10):
+            self.throttle.observe(rejected=True)
+        self.assertEqual(self.throttle.rate, 5)
+
+    def test_that_rate_recovers_up_to_maximum(self):
+        self.throttle.observe(rejected=True)
+        for x in range(10):
+            self.throttle.observe(latency=0.1)
+        self.assertEqual(self.throttle.rate, 100)
+
+    def test_that_actions_are_throttled(self):
+        throttle = Throttle(
+                10, clock=self.clock, sleep=self.clock.sleep)
+        self.assertEqual(len(list(throttle.throttled(range(20)))), 20)
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+
+class IsRejectionTestCase(unittest.TestCase):
+    def test_that_rejected_bulk_items_are_rejection(self):
+        error = BulkIndexError('failed', [
+            {'index': {'_id': '1', 'status': 429}}])
+        self.assertTrue(is_rejection(error))
+
+    def test_that_other_bulk_errors_are_not_rejection(self):
+        error = BulkIndexError('failed', [
+            {'index': {'_id': '1', 'status': 429}},
+            {'index': {'_id': '2', 'status': 400}}])
+        self.assertFalse(is_rejection(error))